@@ -5,12 +5,14 @@ This module provides functions for analyzing movie franchises and directors,
 including comparisons between franchise and standalone movies.
 """
 
+from pyspark import StorageLevel
 from pyspark.sql import DataFrame
 from pyspark.sql import functions as F
-from pyspark.sql.window import Window
 from typing import Optional
 import logging
 
+from ..utils.spark_utils import add_rank_column
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +30,74 @@ class SparkMovieAggregations:
         """
         self.spark = spark
     
+    # ==================== Shared Preparation ====================
+    
+    def _add_derived_columns(self, df: DataFrame) -> DataFrame:
+        """
+        Add is_franchise, profit_musd and roi columns if they are missing.
+        
+        Args:
+            df: Spark DataFrame with movie data
+            
+        Returns:
+            DataFrame with derived columns
+        """
+        if 'is_franchise' not in df.columns:
+            df = df.withColumn(
+                'is_franchise',
+                F.when(F.col('collection_name').isNotNull(), 'Franchise').otherwise('Standalone')
+            )
+        
+        if 'profit_musd' not in df.columns:
+            df = df.withColumn(
+                'profit_musd',
+                F.col('revenue_musd') - F.col('budget_musd')
+            )
+        
+        if 'roi' not in df.columns:
+            df = df.withColumn(
+                'roi',
+                F.when(
+                    F.col('budget_musd') > 0,
+                    ((F.col('revenue_musd') - F.col('budget_musd')) / F.col('budget_musd') * 100)
+                ).otherwise(None)
+            )
+        
+        # Normalized director name for exact, pushdown-friendly lookups
+        if 'director_lower' not in df.columns and 'director' in df.columns:
+            df = df.withColumn('director_lower', F.lower(F.col('director')))
+        
+        return df
+    
+    def prepare(self, df: DataFrame) -> DataFrame:
+        """
+        Compute derived columns once and persist the result for reuse.
+        
+        Running several aggregations on the same DataFrame otherwise re-reads
+        and recomputes the full lineage for every action. The returned DataFrame
+        can be passed to all methods of this class; call ``unpersist()`` on it
+        at the end of the pipeline.
+        
+        Args:
+            df: Spark DataFrame with movie data
+            
+        Returns:
+            Persisted DataFrame with is_franchise, profit_musd, roi and director_lower columns
+            
+        Example:
+            >>> prepared = agg.prepare(df)
+            >>> agg.compare_franchise_vs_standalone(prepared).show()
+            >>> agg.get_top_franchises(prepared).show()
+            >>> prepared.unpersist()
+        """
+        prepared = self._add_derived_columns(df).persist(StorageLevel.MEMORY_AND_DISK)
+        
+        # Materialize the cache so downstream aggregations read from memory
+        count = prepared.count()
+        logger.info(f"Prepared and cached {count} movies for aggregation")
+        
+        return prepared
+    
     # ==================== Franchise vs Standalone Comparison ====================
     
     def compare_franchise_vs_standalone(self, df: DataFrame) -> DataFrame:
@@ -42,28 +112,13 @@ class SparkMovieAggregations:
         - Mean Rating
         
         Args:
-            df: Spark DataFrame with movie data
+            df: Spark DataFrame with movie data (optionally from ``prepare``)
             
         Returns:
             DataFrame with comparison metrics
         """
-        # Add franchise flag
-        df_flagged = df.withColumn(
-            'is_franchise',
-            F.when(F.col('collection_name').isNotNull(), 'Franchise').otherwise('Standalone')
-        )
-        
-        # Calculate profit and ROI if needed
-        df_calc = df_flagged.withColumn(
-            'profit_musd',
-            F.col('revenue_musd') - F.col('budget_musd')
-        ).withColumn(
-            'roi',
-            F.when(
-                F.col('budget_musd') > 0,
-                ((F.col('revenue_musd') - F.col('budget_musd')) / F.col('budget_musd') * 100)
-            ).otherwise(None)
-        )
+        # Add franchise flag, profit and ROI unless already prepared
+        df_calc = self._add_derived_columns(df)
         
         # Group by franchise flag and calculate aggregates
         result = df_calc.groupBy('is_franchise').agg(
@@ -95,7 +150,7 @@ class SparkMovieAggregations:
         - Mean Rating
         
         Args:
-            df: Spark DataFrame with movie data
+            df: Spark DataFrame with movie data (optionally from ``prepare``)
             top_n: Number of top franchises to return
             sort_by: Column to sort by ('total_revenue', 'mean_revenue', 'mean_rating', 'movie_count')
             
@@ -116,13 +171,10 @@ class SparkMovieAggregations:
             F.mean('vote_count').alias('mean_vote_count')
         )
         
-        # Optimize: Sort and Limit FIRST to avoid global window warning
+        # Sort + limit plans as a top-K (TakeOrderedAndProject); the at most
+        # top_n rows are then ranked on the driver without a Window
         df_sorted = franchise_stats.orderBy(F.col(sort_by).desc()).limit(top_n)
-        
-        # Add rank column to the limited set
-        # usage of Window over literal 1 is safe here because dataset is small (top_n)
-        window_spec = Window.orderBy(F.col(sort_by).desc())
-        result = df_sorted.withColumn('rank', F.row_number().over(window_spec))
+        result = add_rank_column(df_sorted)
         
         # Reorder columns for better display
         return result.select(
@@ -156,7 +208,7 @@ class SparkMovieAggregations:
         - Mean Rating
         
         Args:
-            df: Spark DataFrame with movie data
+            df: Spark DataFrame with movie data (optionally from ``prepare``)
             top_n: Number of top directors to return
             sort_by: Column to sort by ('total_revenue', 'mean_revenue', 'mean_rating', 'movie_count')
             min_movies: Minimum number of movies to be included in analysis
@@ -181,12 +233,9 @@ class SparkMovieAggregations:
         # Filter by minimum movies
         filtered = director_stats.filter(F.col('movie_count') >= min_movies)
         
-        # Optimize: Sort and Limit FIRST
+        # Top-K sort + limit, then rank the at most top_n rows on the driver
         df_sorted = filtered.orderBy(F.col(sort_by).desc()).limit(top_n)
-        
-        # Add rank column
-        window_spec = Window.orderBy(F.col(sort_by).desc())
-        result = df_sorted.withColumn('rank', F.row_number().over(window_spec))
+        result = add_rank_column(df_sorted)
         
         # Reorder columns for better display
         return result.select(
@@ -203,24 +252,36 @@ class SparkMovieAggregations:
     
     # ==================== Specific Analyses ====================
     
-    def get_franchise_details(self, df: DataFrame, franchise_name: str) -> DataFrame:
+    def get_franchise_details(
+        self,
+        df: DataFrame,
+        franchise_name: str,
+        exact: bool = True
+    ) -> DataFrame:
         """
         Get detailed statistics for a specific franchise.
         
+        Exact matching uses an equality predicate, which is pushed down to
+        Parquet readers so row groups can be skipped via min/max statistics
+        and dictionary filters.
+        
         Args:
-            df: Spark DataFrame with movie data
+            df: Spark DataFrame with movie data (optionally from ``prepare``)
             franchise_name: Name of the franchise to analyze
+            exact: If True, match the collection name exactly. If False, partial match
             
         Returns:
             DataFrame with all movies in the franchise and key metrics
         """
         # Filter for specific franchise
-        franchise_movies = df.filter(
-            F.col('collection_name').contains(franchise_name)
-        )
+        if exact:
+            condition = F.col('collection_name') == franchise_name
+        else:
+            condition = F.col('collection_name').contains(franchise_name)
         
-        # Select relevant columns
-        result = franchise_movies.select(
+        # Project first so the reader only loads the needed columns
+        # (collection_name doubles as the filter column)
+        result = df.select(
             'title',
             'release_year',
             'budget_musd',
@@ -230,28 +291,49 @@ class SparkMovieAggregations:
             'popularity',
             'director',
             'collection_name'
-        ).orderBy('release_year')
+        ).filter(condition).orderBy('release_year')
         
         return result
     
-    def get_director_details(self, df: DataFrame, director_name: str) -> DataFrame:
+    def get_director_details(
+        self,
+        df: DataFrame,
+        director_name: str,
+        exact: bool = True
+    ) -> DataFrame:
         """
         Get detailed statistics for a specific director.
         
+        Matching is case-insensitive. When the DataFrame comes from ``prepare``,
+        exact lookups compare against the precomputed ``director_lower`` column
+        instead of lowercasing every row, which keeps the predicate pushable.
+        
         Args:
-            df: Spark DataFrame with movie data
+            df: Spark DataFrame with movie data (optionally from ``prepare``)
             director_name: Name of the director to analyze
+            exact: If True, match the director name exactly. If False, partial match
             
         Returns:
             DataFrame with all movies by the director and key metrics
         """
-        # Filter for specific director (case-insensitive, partial match)
-        director_movies = df.filter(
-            F.lower(F.col('director')).contains(director_name.lower())
-        )
+        director_name_lower = director_name.lower()
+        
+        if 'director_lower' in df.columns:
+            filter_col = 'director_lower'
+            director_col = F.col('director_lower')
+        else:
+            filter_col = 'director'
+            director_col = F.lower(F.col('director'))
         
-        # Select relevant columns
-        result = director_movies.select(
+        # Filter for specific director (case-insensitive)
+        if exact:
+            condition = director_col == director_name_lower
+        else:
+            condition = director_col.contains(director_name_lower)
+        
+        # Project first (including the filter column) so the reader only loads
+        # the needed columns, then drop the filter column from the output
+        result = df.select(
             'title',
             'release_year',
             'budget_musd',
@@ -260,7 +342,8 @@ class SparkMovieAggregations:
             'vote_count',
             'popularity',
             'genres',
-            'collection_name'
-        ).orderBy('release_year')
+            'collection_name',
+            filter_col
+        ).filter(condition).orderBy('release_year').drop(filter_col)
         
         return result
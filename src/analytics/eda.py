@@ -12,8 +12,13 @@ This module provides comprehensive EDA functionality including:
 - Data quality reporting
 """
 
+from pyspark import StorageLevel
 from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql import functions as F
+from pyspark.ml.feature import VectorAssembler
+from pyspark.ml.stat import Correlation
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
@@ -38,12 +43,13 @@ class SparkEDA:
         """
         self.spark = spark
         
-    def dataset_overview(self, df: DataFrame) -> dict:
+    def dataset_overview(self, df: DataFrame, total_rows: int = None) -> dict:
         """
         Get basic dataset overview statistics.
         
         Args:
             df: Spark DataFrame with movie data
+            total_rows: Precomputed row count (skips df.count() when supplied)
             
         Returns:
             Dictionary with overview statistics
@@ -52,7 +58,7 @@ class SparkEDA:
         print("1. DATASET OVERVIEW")
         print("="*80)
         
-        row_count = df.count()
+        row_count = total_rows if total_rows is not None else df.count()
         col_count = len(df.columns)
         
         print(f"\nDataset Shape:")
@@ -69,45 +75,51 @@ class SparkEDA:
             'columns': df.columns
         }
     
-    def missing_value_analysis(self, df: DataFrame, visualize: bool = True):
+    def missing_value_analysis(self, df: DataFrame, visualize: bool = True, total_rows: int = None):
         """
         Analyze and visualize missing values in the dataset.
         
         Args:
             df: Spark DataFrame with movie data
             visualize: Whether to create visualization
+            total_rows: Precomputed row count (otherwise counted in the same aggregation)
             
         Returns:
-            DataFrame with missing value statistics
+            pandas DataFrame with missing value statistics
         """
         print("\n" + "="*80)
         print("2. MISSING VALUE ANALYSIS")
         print("="*80)
         
-        # Calculate null counts
-        null_counts = []
-        total_rows = df.count()
+        # Calculate row count and all null counts in a single aggregation
+        agg_exprs = [F.count(F.when(F.col(col).isNull(), 1)).alias(col) for col in df.columns]
+        if total_rows is None:
+            agg_exprs.append(F.count(F.lit(1)).alias('__total__'))
+        counts = df.agg(*agg_exprs).collect()[0]
+        if total_rows is None:
+            total_rows = counts['__total__']
         
+        null_counts = []
         for col in df.columns:
-            null_count = df.filter(F.col(col).isNull()).count()
-            null_percentage = (null_count / total_rows) * 100
+            null_count = counts[col]
+            null_percentage = (null_count / total_rows) * 100 if total_rows else 0.0
             null_counts.append({
                 'column': col,
                 'null_count': null_count,
                 'null_percentage': round(null_percentage, 2)
             })
         
-        # Create Spark DataFrame
-        null_df = self.spark.createDataFrame(null_counts)
-        null_df_sorted = null_df.orderBy(F.col('null_percentage').desc())
+        # Counts are already on the driver, so keep them in pandas
+        null_df_sorted = pd.DataFrame(null_counts, columns=['column', 'null_count', 'null_percentage']) \
+            .sort_values('null_percentage', ascending=False) \
+            .reset_index(drop=True)
         
         print("\nMissing Values by Column (sorted by percentage):")
-        null_df_sorted.show(30, truncate=False)
+        print(null_df_sorted.head(30).to_string(index=False))
         
         # Visualize if requested
         if visualize:
-            null_pd = null_df_sorted.toPandas()
-            null_pd_filtered = null_pd[null_pd['null_percentage'] > 0]
+            null_pd_filtered = null_df_sorted[null_df_sorted['null_percentage'] > 0]
             
             if len(null_pd_filtered) > 0:
                 plt.figure(figsize=(12, 6))
@@ -122,13 +134,22 @@ class SparkEDA:
         
         return null_df_sorted
     
-    def statistical_summary(self, df: DataFrame, numerical_cols: list = None):
+    def statistical_summary(
+        self,
+        df: DataFrame,
+        numerical_cols: list = None,
+        percentile_accuracy: int = 10000
+    ):
         """
         Generate statistical summary for numerical columns.
         
+        Quartiles are approximate (percentile_approx), which avoids a full sort
+        per column. Higher accuracy trades memory for precision.
+        
         Args:
             df: Spark DataFrame with movie data
             numerical_cols: List of numerical columns to analyze
+            percentile_accuracy: Accuracy parameter passed to percentile_approx
         """
         print("\n" + "="*80)
         print("3. STATISTICAL SUMMARY OF NUMERICAL COLUMNS")
@@ -145,35 +166,45 @@ class SparkEDA:
         df.select(existing_cols).summary().show()
         
         print("\nAdditional Statistics:")
+        
+        # Compute statistics for all columns in a single aggregation
+        exprs = []
         for col in existing_cols:
-            stats = df.select(
-                F.count(col).alias('count'),
-                F.mean(col).alias('mean'),
-                F.stddev(col).alias('std'),
-                F.min(col).alias('min'),
-                F.expr(f'percentile({col}, 0.25)').alias('25%'),
-                F.expr(f'percentile({col}, 0.50)').alias('median'),
-                F.expr(f'percentile({col}, 0.75)').alias('75%'),
-                F.max(col).alias('max')
-            ).collect()[0]
+            exprs.extend([
+                F.count(col).alias(f'{col}__count'),
+                F.mean(col).alias(f'{col}__mean'),
+                F.stddev(col).alias(f'{col}__std'),
+                F.min(col).alias(f'{col}__min'),
+                F.expr(f'percentile_approx({col}, array(0.25, 0.5, 0.75), {percentile_accuracy})').alias(f'{col}__quantiles'),
+                F.max(col).alias(f'{col}__max')
+            ])
+        stats = df.agg(*exprs).collect()[0]
+        
+        for col in existing_cols:
+            q25, median, q75 = stats[f'{col}__quantiles']
             
             print(f"\n{col}:")
-            print(f"  Count: {stats['count']:,}")
-            print(f"  Mean: {stats['mean']:.2f}")
-            print(f"  Std: {stats['std']:.2f}")
-            print(f"  Min: {stats['min']:.2f}")
-            print(f"  25%: {stats['25%']:.2f}")
-            print(f"  Median: {stats['median']:.2f}")
-            print(f"  75%: {stats['75%']:.2f}")
-            print(f"  Max: {stats['max']:.2f}")
+            print(f"  Count: {stats[f'{col}__count']:,}")
+            print(f"  Mean: {stats[f'{col}__mean']:.2f}")
+            print(f"  Std: {stats[f'{col}__std']:.2f}")
+            print(f"  Min: {stats[f'{col}__min']:.2f}")
+            print(f"  25%: {q25:.2f}")
+            print(f"  Median: {median:.2f}")
+            print(f"  75%: {q75:.2f}")
+            print(f"  Max: {stats[f'{col}__max']:.2f}")
     
-    def plot_distributions(self, df: DataFrame, columns: list = None):
+    def plot_distributions(self, df: DataFrame, columns: list = None, bins: int = 30):
         """
         Plot distribution histograms for numerical columns.
         
+        Histogram bins are computed in Spark with two DataFrame jobs for all
+        columns together (one for the value ranges, one for the bucket
+        counts), so only the counts are collected to the driver.
+        
         Args:
             df: Spark DataFrame with movie data
             columns: List of columns to plot
+            bins: Number of histogram bins per column
         """
         print("\n" + "="*80)
         print("4. DATA DISTRIBUTIONS")
@@ -191,18 +222,52 @@ class SparkEDA:
         fig, axes = plt.subplots(3, 3, figsize=(16, 12))
         axes = axes.flatten()
         
-        for idx, col in enumerate(plot_cols):
-            if idx < len(axes) and col in df_with_profit.columns:
-                data = df_with_profit.select(col).filter(F.col(col).isNotNull()).toPandas()
-                
-                if len(data) > 0:
-                    axes[idx].hist(data[col].dropna(), bins=30, color='skyblue', 
-                                 edgecolor='black', alpha=0.7)
-                    axes[idx].set_title(f'{col.replace("_", " ").title()} Distribution', 
-                                      fontweight='bold')
-                    axes[idx].set_xlabel(col.replace('_', ' ').title())
-                    axes[idx].set_ylabel('Frequency')
-                    axes[idx].grid(alpha=0.3)
+        present = {col: idx for idx, col in enumerate(plot_cols)
+                   if idx < len(axes) and col in df_with_profit.columns}
+        
+        # Value range of every column in one pass (null for all-null columns)
+        limits = df_with_profit.agg(
+            *[F.min(col).alias(f'{col}_min') for col in present],
+            *[F.max(col).alias(f'{col}_max') for col in present]
+        ).first() if present else {}
+        
+        edges = {}
+        buckets = []
+        for col in present:
+            lo, hi = limits[f'{col}_min'], limits[f'{col}_max']
+            if lo is None:
+                continue
+            lo, hi = float(lo), float(hi)
+            if hi > lo:
+                n_bins, width = bins, (hi - lo) / bins
+                edges[col] = np.linspace(lo, hi, bins + 1)
+            else:
+                # A constant column gets one bucket around its value
+                n_bins, width = 1, 1.0
+                edges[col] = np.array([lo - 0.5, lo + 0.5])
+            # As with RDD.histogram, the last bucket includes the maximum
+            bucket = F.least(F.floor((F.col(col) - F.lit(lo)) / F.lit(width)), F.lit(n_bins - 1))
+            buckets.append(F.struct(F.lit(col).alias('col'), bucket.cast('int').alias('bucket')))
+        
+        # Bucket counts for all columns in one aggregation
+        hist = {col: np.zeros(len(col_edges) - 1) for col, col_edges in edges.items()}
+        if buckets:
+            counts = df_with_profit.select(F.explode(F.array(*buckets)).alias('b')) \
+                .filter(F.col('b.bucket').isNotNull()) \
+                .groupBy('b.col', 'b.bucket').count() \
+                .collect()
+            for row in counts:
+                hist[row['col']][row['bucket']] = row['count']
+        
+        for col, col_edges in edges.items():
+            ax = axes[present[col]]
+            ax.bar(col_edges[:-1], hist[col], width=np.diff(col_edges), align='edge',
+                   color='skyblue', edgecolor='black', alpha=0.7)
+            ax.set_title(f'{col.replace("_", " ").title()} Distribution', 
+                         fontweight='bold')
+            ax.set_xlabel(col.replace('_', ' ').title())
+            ax.set_ylabel('Frequency')
+            ax.grid(alpha=0.3)
         
         plt.tight_layout()
         plt.show()
@@ -220,16 +285,27 @@ class SparkEDA:
         
         # Genre distribution
         print("\n5.1 Top 15 Genres (by movie count):")
+        # orderBy + limit plans as a per-partition top-k (TakeOrderedAndProject),
+        # so no single-partition window is needed and the result stays sorted
         genre_counts = df.select(F.explode(F.split(F.col('genres'), '\\|')).alias('genre')) \
             .groupBy('genre') \
-            .count() \
-            .orderBy(F.col('count').desc()) \
+            .agg(F.count(F.lit(1)).alias('count')) \
+            .orderBy(F.col('count').desc(), F.col('genre')) \
             .limit(15)
         
-        genre_counts.show(truncate=False)
+        # There are only a few dozen genres, so aggregate into a handful of
+        # shuffle partitions; the session setting is restored afterwards
+        conf = df.sparkSession.conf
+        shuffle_partitions = conf.get('spark.sql.shuffle.partitions')
+        conf.set('spark.sql.shuffle.partitions', '4')
+        try:
+            genre_pd = genre_counts.toPandas()
+        finally:
+            conf.set('spark.sql.shuffle.partitions', shuffle_partitions)
+        
+        print(genre_pd.to_string(index=False))
         
         # Visualize genres
-        genre_pd = genre_counts.toPandas()
         plt.figure(figsize=(12, 6))
         sns.barplot(data=genre_pd, x='count', y='genre', palette='viridis')
         plt.title('Top 15 Movie Genres', fontsize=14, fontweight='bold')
@@ -272,6 +348,10 @@ class SparkEDA:
         """
         Analyze correlations between numerical features.
         
+        The Pearson correlation matrix is computed in Spark; only the small
+        N x N matrix is brought back to the driver. Rows with a null in any
+        of the analyzed columns are skipped.
+        
         Args:
             df: Spark DataFrame with movie data
             columns: List of columns to analyze
@@ -287,9 +367,11 @@ class SparkEDA:
         # Filter to existing columns
         existing_cols = [col for col in columns if col in df.columns]
         
-        # Convert to pandas for correlation
-        corr_data = df.select(existing_cols).toPandas()
-        correlation_matrix = corr_data.corr()
+        # Compute correlation matrix in Spark
+        assembler = VectorAssembler(inputCols=existing_cols, outputCol='features', handleInvalid='skip')
+        vectors = assembler.transform(df.select(existing_cols)).select('features')
+        matrix = Correlation.corr(vectors, 'features').head()[0].toArray()
+        correlation_matrix = pd.DataFrame(matrix, index=existing_cols, columns=existing_cols)
         
         print("\nCorrelation Matrix:")
         print(correlation_matrix.round(3))
@@ -305,19 +387,40 @@ class SparkEDA:
         
         return correlation_matrix
     
-    def data_quality_report(self, df: DataFrame, null_counts_data: list):
+    def data_quality_report(self, df: DataFrame, null_counts_data: list, total_rows: int = None):
         """
         Generate comprehensive data quality report.
         
         Args:
             df: Spark DataFrame with movie data
             null_counts_data: List of null count dictionaries from missing_value_analysis
+            total_rows: Precomputed row count (otherwise counted in the same aggregation)
         """
         print("\n" + "="*80)
         print("8. DATA QUALITY REPORT")
         print("="*80)
         
-        total_rows = df.count()
+        # Row count and quality metrics in a single pass
+        valid_financial_cond = (
+            (F.col('budget_musd').isNotNull()) & 
+            (F.col('revenue_musd').isNotNull()) &
+            (F.col('budget_musd') > 0) &
+            (F.col('revenue_musd') > 0)
+        )
+        rated_cond = (
+            (F.col('vote_count') >= 10) &
+            (F.col('vote_average').isNotNull())
+        )
+        agg_exprs = [
+            F.sum(valid_financial_cond.cast('long')).alias('valid_financial'),
+            F.sum(rated_cond.cast('long')).alias('rated')
+        ]
+        if total_rows is None:
+            agg_exprs.append(F.count(F.lit(1)).alias('total'))
+        stats = df.agg(*agg_exprs).collect()[0]
+        
+        if total_rows is None:
+            total_rows = stats['total']
         total_cols = len(df.columns)
         total_cells = total_rows * total_cols
         total_nulls = sum([row['null_count'] for row in null_counts_data])
@@ -329,27 +432,20 @@ class SparkEDA:
         print(f"Missing cells: {total_nulls:,}")
         
         # Financial data quality
-        valid_financial = df.filter(
-            (F.col('budget_musd').isNotNull()) & 
-            (F.col('revenue_musd').isNotNull()) &
-            (F.col('budget_musd') > 0) &
-            (F.col('revenue_musd') > 0)
-        ).count()
-        
+        valid_financial = stats['valid_financial'] or 0
         print(f"\nMovies with valid financial data: {valid_financial:,} ({(valid_financial/total_rows)*100:.1f}%)")
         
         # Rating data quality
-        rated_movies = df.filter(
-            (F.col('vote_count') >= 10) &
-            (F.col('vote_average').isNotNull())
-        ).count()
-        
+        rated_movies = stats['rated'] or 0
         print(f"Movies with reliable ratings (≥10 votes): {rated_movies:,} ({(rated_movies/total_rows)*100:.1f}%)")
     
     def run_full_eda(self, df: DataFrame):
         """
         Run complete EDA pipeline on the dataset.
         
+        The DataFrame is persisted for the duration of the run and counted
+        once; the row count is shared by all steps.
+        
         Args:
             df: Spark DataFrame with movie data
         """
@@ -357,22 +453,31 @@ class SparkEDA:
         print("EXPLORATORY DATA ANALYSIS")
         print("="*80)
         
-        # 1. Dataset Overview
-        overview = self.dataset_overview(df)
-        
-        # 2. Missing Value Analysis
-        null_df = self.missing_value_analysis(df, visualize=True)
-        null_counts_list = null_df.collect()
-        null_counts_data = [row.asDict() for row in null_counts_list]
-        
-        # 3. Statistical Summary
-        self.statistical_summary(df)
-        
-        # 4. Distributions
-        self.plot_distributions(df)
-        
-        # 5. Categorical Analysis (Genres only)
-        self.categorical_analysis(df)
+        # Cache once for all EDA steps and count a single time. A caller's
+        # existing cache (e.g. from prepare()) is left in place afterwards
+        was_cached = df.is_cached
+        df = df.persist(StorageLevel.MEMORY_AND_DISK)
+        try:
+            row_count = df.count()
+            
+            # 1. Dataset Overview
+            overview = self.dataset_overview(df, total_rows=row_count)
+            
+            # 2. Missing Value Analysis
+            null_df = self.missing_value_analysis(df, visualize=True, total_rows=row_count)
+            null_counts_data = null_df.to_dict('records')
+            
+            # 3. Statistical Summary
+            self.statistical_summary(df)
+            
+            # 4. Distributions
+            self.plot_distributions(df)
+            
+            # 5. Categorical Analysis (Genres only)
+            self.categorical_analysis(df)
+        finally:
+            if not was_cached:
+                df.unpersist()
         
         print("\n" + "="*80)
         print("EDA COMPLETE")
@@ -5,10 +5,16 @@ This module provides functions for filtering movies by genre, actor, director,
 and executing complex multi-criteria searches using PySpark.
 """
 
+from pyspark import StorageLevel
 from pyspark.sql import DataFrame, Column
 from pyspark.sql import functions as F
+from functools import reduce
 from typing import Optional, List, Union
 import logging
+import operator
+import re
+
+from ..cleaning.cleaner import GENRE_BITS
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +22,10 @@ logger = logging.getLogger(__name__)
 class SparkMovieFilters:
     """
     Handles advanced filtering and search operations for movie data using PySpark.
+    
+    Filters are applied directly to base columns so Catalyst can push them
+    down to Parquet. For dictionary filtering to skip row groups effectively,
+    write ``genres``, ``cast`` and ``director`` sorted and dictionary-encoded.
     """
     
     def __init__(self, spark=None):
@@ -26,6 +36,168 @@ class SparkMovieFilters:
             spark: SparkSession instance (optional)
         """
         self.spark = spark
+        # Empty DataFrames keyed by schema, reused for "column missing" results
+        self._empty_like = {}
+        # Predicates of the pre-defined searches, keyed by query and columns
+        self._query_conditions = {}
+    
+    def prepare(self, df: DataFrame) -> DataFrame:
+        """
+        Precompute normalized search columns once and persist the result.
+        
+        Adds ``genres_arr`` (split genres), ``cast_lower`` and ``director_lower``
+        so repeated searches match against cached columns instead of splitting
+        and lowercasing every row per query. Call ``unpersist()`` on the
+        returned DataFrame when done.
+        
+        Args:
+            df: Spark DataFrame with movie data
+            
+        Returns:
+            Persisted DataFrame with the additional search columns
+            
+        Example:
+            >>> prepared = filters.prepare(df)
+            >>> filters.filter_by_actor(prepared, "Bruce Willis").show()
+        """
+        if 'genres_arr' not in df.columns and 'genres' in df.columns:
+            df = df.withColumn('genres_arr', F.split(F.col('genres'), r'\|'))
+        
+        for col_name in ['cast', 'director']:
+            if f'{col_name}_lower' not in df.columns and col_name in df.columns:
+                df = df.withColumn(f'{col_name}_lower', F.lower(F.col(col_name)))
+        
+        prepared = df.persist(StorageLevel.MEMORY_AND_DISK)
+        
+        # Materialize the cache so the first search does not pay for it
+        count = prepared.count()
+        logger.info(f"Prepared and cached {count} movies for searching")
+        
+        return prepared
+    
+    def _empty(self, df: DataFrame) -> DataFrame:
+        """
+        Get a cached empty DataFrame with the same schema as ``df``.
+        
+        An empty local relation lets Catalyst fold downstream operations away
+        at plan time, so no job is scheduled for it.
+        
+        Args:
+            df: Spark DataFrame whose schema to match
+            
+        Returns:
+            Empty DataFrame with the schema of ``df``
+        """
+        key = df.schema.json()
+        if key not in self._empty_like:
+            self._empty_like[key] = df.sparkSession.createDataFrame([], df.schema)
+        return self._empty_like[key]
+    
+    def _query_condition(self, name: str, df: DataFrame, build) -> Column:
+        """
+        Get the cached predicate of a pre-defined search, building it on first use.
+        
+        The predicate depends on which prepared columns are present, so it is
+        cached per query name and column set.
+        
+        Args:
+            name: Name of the pre-defined search
+            df: Spark DataFrame with movie data
+            build: Callable taking ``df`` and returning the Column predicate
+            
+        Returns:
+            Boolean Column expression
+        """
+        key = (name, tuple(df.columns))
+        if key not in self._query_conditions:
+            self._query_conditions[key] = build(df)
+        return self._query_conditions[key]
+    
+    @staticmethod
+    def _lower(df: DataFrame, col_name: str) -> Column:
+        """
+        Get the lowercased version of a column, using the prepared column if present.
+        
+        Args:
+            df: Spark DataFrame with movie data
+            col_name: Name of the string column
+            
+        Returns:
+            Column expression with lowercased values
+        """
+        if f'{col_name}_lower' in df.columns:
+            return F.col(f'{col_name}_lower')
+        return F.lower(F.col(col_name))
+    
+    @staticmethod
+    def _contains_any(df: DataFrame, col_name: str, values: List[str]) -> Column:
+        """
+        Case-insensitive "contains any of" condition evaluated as a single regex.
+        
+        One alternation pattern scans each string once, instead of one
+        ``contains`` per value OR-ed together.
+        
+        Args:
+            df: Spark DataFrame with movie data
+            col_name: Name of the string column to search
+            values: Substrings to look for
+            
+        Returns:
+            Boolean Column expression
+        """
+        if f'{col_name}_lower' in df.columns:
+            pattern = '|'.join(re.escape(value.lower()) for value in values)
+            return F.col(f'{col_name}_lower').rlike(pattern)
+        
+        pattern = '|'.join(re.escape(value) for value in values)
+        return F.col(col_name).rlike(f'(?iu)(?:{pattern})')
+    
+    def _genre_condition(
+        self,
+        df: DataFrame,
+        genres: Union[str, List[str]],
+        match_all: bool
+    ) -> Column:
+        """
+        Build the genre match condition used by filter_by_genres and search_movies.
+        
+        Args:
+            df: Spark DataFrame with movie data
+            genres: Single genre string or list of genres to match
+            match_all: If True, movie must have ALL genres. If False, ANY genre matches
+            
+        Returns:
+            Boolean Column expression
+        """
+        # Convert single genre to list
+        if isinstance(genres, str):
+            genres = [genres]
+        
+        # Deduplicate while keeping order so the match_all size check is exact
+        genres = list(dict.fromkeys(genres))
+        
+        # One integer AND per row when the cleaned genre bitmask is available
+        if match_all and 'genre_mask' in df.columns and all(g in GENRE_BITS for g in genres):
+            required = reduce(operator.or_, (GENRE_BITS[g] for g in genres), 0)
+            return F.col('genre_mask').bitwiseAND(F.lit(required)) == required
+        
+        # Use pre-split genre array if available
+        if 'genres_arr' in df.columns:
+            genres_arr = F.col('genres_arr')
+        else:
+            genres_arr = F.split(F.col('genres'), r'\|')
+        
+        wanted = F.array(*[F.lit(genre) for genre in genres])
+        
+        # Create filter condition
+        if match_all:
+            # Movie must have ALL genres
+            condition = F.size(F.array_intersect(genres_arr, wanted)) == len(genres)
+        else:
+            # Movie must have ANY genre
+            condition = F.arrays_overlap(genres_arr, wanted)
+        
+        return condition
     
     def filter_by_genres(
         self,
@@ -37,6 +209,10 @@ class SparkMovieFilters:
         Filter movies by genre(s).
         
         Genres in the dataset are pipe-separated strings (e.g., "Action|Adventure|Sci-Fi").
+        Matching is done on whole genre names. With ``match_all`` and a
+        ``genre_mask`` column (added at cleaning time) the check is a single
+        bitmask test; otherwise array operations run on a ``genres_arr``
+        column when present, or on the split string.
         
         Args:
             df: Spark DataFrame with movie data
@@ -50,39 +226,32 @@ class SparkMovieFilters:
             >>> filters.filter_by_genres(df, ["Action", "Adventure"], match_all=True)
             >>> filters.filter_by_genres(df, "Comedy", match_all=False)
         """
-        # Convert single genre to list
-        if isinstance(genres, str):
-            genres = [genres]
+        # Matching all of no genres keeps every movie; matching any keeps none
+        if not genres:
+            return df if match_all else self._empty(df)
         
-        # Create filter condition
-        if match_all:
-            # Movie must have ALL genres
-            condition = F.lit(True)
-            for genre in genres:
-                condition = condition & F.col('genres').contains(genre)
-        else:
-            # Movie must have ANY genre
-            condition = F.lit(False)
-            for genre in genres:
-                condition = condition | F.col('genres').contains(genre)
-        
-        return df.filter(condition)
+        return df.filter(self._genre_condition(df, genres, match_all))
     
     def filter_by_actor(
         self,
         df: DataFrame,
         actor_name: str,
-        case_sensitive: bool = False
+        case_sensitive: bool = False,
+        cast_index: Optional[DataFrame] = None
     ) -> DataFrame:
         """
         Filter movies where actor appears in cast.
         
-        Cast in the dataset is a pipe-separated string of actor names.
+        Cast in the dataset is a pipe-separated string of actor names. When a
+        cast index (see ``SparkMovieDataCleaner.build_cast_index``) is given,
+        matching movie ids are looked up in the index and broadcast-joined
+        back, instead of scanning every cast string.
         
         Args:
             df: Spark DataFrame with movie data
             actor_name: Actor name to search for (supports partial matching)
             case_sensitive: If True, perform case-sensitive search
+            cast_index: Optional DataFrame with id, actor, actor_lower columns
             
         Returns:
             Filtered DataFrame
@@ -91,17 +260,27 @@ class SparkMovieFilters:
             >>> filters.filter_by_actor(df, "Bruce Willis")
             >>> filters.filter_by_actor(df, "willis", case_sensitive=False)
         """
+        if cast_index is not None:
+            if case_sensitive:
+                index_condition = F.col('actor').contains(actor_name)
+            else:
+                index_condition = F.col('actor_lower').contains(actor_name.lower())
+            
+            hits = cast_index.filter(index_condition).select('id').distinct()
+            return df.join(F.broadcast(hits), on='id', how='left_semi')
+        
         if 'cast' not in df.columns:
             logger.warning("'cast' column not found in DataFrame")
-            return df.filter(F.lit(False))  # Return empty DataFrame
+            return self._empty(df)
         
         if case_sensitive:
             condition = F.col('cast').contains(actor_name)
         else:
             # Case-insensitive search: convert both to lowercase
-            condition = F.lower(F.col('cast')).contains(actor_name.lower())
+            condition = self._lower(df, 'cast').contains(actor_name.lower())
         
-        return df.filter(condition & F.col('cast').isNotNull())
+        # Cheap null check first; it is pushed down to Parquet as IsNotNull
+        return df.filter(F.col('cast').isNotNull() & condition)
     
     def filter_by_director(
         self,
@@ -126,15 +305,16 @@ class SparkMovieFilters:
         """
         if 'director' not in df.columns:
             logger.warning("'director' column not found in DataFrame")
-            return df.filter(F.lit(False))  # Return empty DataFrame
+            return self._empty(df)
         
         if case_sensitive:
             condition = F.col('director').contains(director_name)
         else:
             # Case-insensitive search: convert both to lowercase
-            condition = F.lower(F.col('director')).contains(director_name.lower())
+            condition = self._lower(df, 'director').contains(director_name.lower())
         
-        return df.filter(condition & F.col('director').isNotNull())
+        # Cheap null check first; it is pushed down to Parquet as IsNotNull
+        return df.filter(F.col('director').isNotNull() & condition)
     
     def filter_by_year_range(
         self,
@@ -145,6 +325,9 @@ class SparkMovieFilters:
         """
         Filter movies by release year range.
         
+        Apply this directly to the DataFrame read from the cleaned Parquet
+        output (partitioned by release_year) so Spark prunes partitions.
+        
         Args:
             df: Spark DataFrame with movie data
             start_year: Minimum release year (inclusive)
@@ -198,44 +381,40 @@ class SparkMovieFilters:
             >>> filters.search_movies(df, genres=["Action", "Sci-Fi"], actors="Keanu Reeves",
             ...                       sort_by='revenue_musd', ascending=False, top_n=10)
         """
-        result = df
+        # Collect all predicates and apply them in a single filter
+        conditions = []
+        
+        # Cheap numeric predicates first, ahead of the string matching
+        if min_rating is not None:
+            conditions.append(F.col('vote_average') >= min_rating)
         
-        # Apply genre filter (ALL must match)
-        if genres is not None:
-            result = self.filter_by_genres(result, genres, match_all=True)
+        if min_votes is not None:
+            conditions.append(F.col('vote_count') >= min_votes)
         
-        # Apply actor filter (ANY must match)
+        # Genre condition (ALL must match); an empty list adds no predicate
+        if genres:
+            conditions.append(self._genre_condition(df, genres, match_all=True))
+        
+        # Actor condition (ANY must match); rlike on NULL cast is NULL, i.e. filtered out
         if actors is not None:
             if isinstance(actors, str):
                 actors = [actors]
             
-            actor_condition = F.lit(False)
-            for actor in actors:
-                actor_condition = actor_condition | F.lower(F.col('cast')).contains(actor.lower())
-            
-            result = result.filter(actor_condition & F.col('cast').isNotNull())
+            conditions.append(self._contains_any(df, 'cast', actors))
         
-        # Apply director filter (ANY must match)
+        # Director condition (ANY must match)
         if directors is not None:
             if isinstance(directors, str):
                 directors = [directors]
             
-            director_condition = F.lit(False)
-            for director in directors:
-                director_condition = director_condition | F.lower(F.col('director')).contains(director.lower())
-            
-            result = result.filter(director_condition & F.col('director').isNotNull())
+            conditions.append(self._contains_any(df, 'director', directors))
         
-        # Apply rating filter
-        if min_rating is not None:
-            result = result.filter(F.col('vote_average') >= min_rating)
-        
-        # Apply vote count filter
-        if min_votes is not None:
-            result = result.filter(F.col('vote_count') >= min_votes)
+        result = df
+        if conditions:
+            result = result.filter(reduce(operator.and_, conditions))
         
         # Sort results
-        if sort_by in result.columns:
+        if sort_by in df.columns:
             if ascending:
                 result = result.orderBy(F.col(sort_by).asc())
             else:
@@ -264,18 +443,21 @@ class SparkMovieFilters:
         Returns:
             Filtered and sorted DataFrame with relevant columns
         """
-        results = self.search_movies(
-            df,
-            genres=["Science Fiction", "Action"],
-            actors="Bruce Willis",
-            sort_by='vote_average',
-            ascending=False
+        condition = self._query_condition(
+            'scifi_action_bruce_willis', df,
+            lambda d: self._genre_condition(d, ["Science Fiction", "Action"], match_all=True)
+                      & self._contains_any(d, 'cast', ["Bruce Willis"])
         )
         
+        columns = set(df.columns)
+        results = df.filter(condition)
+        if 'vote_average' in columns:
+            results = results.orderBy(F.col('vote_average').desc())
+        
         # Select relevant columns for display
         display_cols = ['title', 'release_year', 'vote_average', 'vote_count',
                         'genres', 'director', 'revenue_musd']
-        available_cols = [col for col in display_cols if col in results.columns]
+        available_cols = [col for col in display_cols if col in columns]
         
         return results.select(*available_cols)
     
@@ -294,17 +476,20 @@ class SparkMovieFilters:
         Returns:
             Filtered and sorted DataFrame with relevant columns
         """
-        results = self.search_movies(
-            df,
-            actors="Uma Thurman",
-            directors="Quentin Tarantino",
-            sort_by='runtime',
-            ascending=True
+        condition = self._query_condition(
+            'uma_tarantino', df,
+            lambda d: self._contains_any(d, 'cast', ["Uma Thurman"])
+                      & self._contains_any(d, 'director', ["Quentin Tarantino"])
         )
         
+        columns = set(df.columns)
+        results = df.filter(condition)
+        if 'runtime' in columns:
+            results = results.orderBy(F.col('runtime').asc())
+        
         # Select relevant columns for display
         display_cols = ['title', 'release_year', 'runtime', 'vote_average',
                         'genres', 'revenue_musd', 'budget_musd']
-        available_cols = [col for col in display_cols if col in results.columns]
+        available_cols = [col for col in display_cols if col in columns]
         
         return results.select(*available_cols)
@@ -7,10 +7,11 @@ including revenue, budget, profit, ROI, ratings, and popularity using PySpark.
 
 from pyspark.sql import DataFrame, Column
 from pyspark.sql import functions as F
-from pyspark.sql.window import Window
 from typing import Optional, List
 import logging
 
+from ..utils.spark_utils import add_rank_column
+
 logger = logging.getLogger(__name__)
 
 
@@ -60,21 +61,37 @@ class SparkKPICalculator:
         # Create working copy
         df_filtered = df
         
-        # Calculate derived columns if missing
-        if 'release_year' not in df_filtered.columns and 'release_date' in df_filtered.columns:
+        # Fetch the schema once; df.columns is a JVM round-trip on every access
+        columns = set(df.columns)
+        
+        # Bail out early if the metric is neither present nor derivable
+        derivable = {'profit_musd', 'roi'} if {'revenue_musd', 'budget_musd'} <= columns else set()
+        if metric not in columns and metric not in derivable:
+            logger.warning(f"Metric '{metric}' not found in DataFrame")
+            # Empty result built from the input plan (no createDataFrame round-trip)
+            return df.limit(0).select(
+                F.lit(None).cast('int').alias('rank'),
+                F.lit(None).cast('string').alias('title')
+            )
+        
+        # Calculate derived columns if missing (cleaned data already has
+        # release_year, profit_musd and roi materialized)
+        if 'release_year' not in columns and 'release_date' in columns:
             df_filtered = df_filtered.withColumn('release_year', F.year(F.col('release_date')))
+            columns.add('release_year')
         
         # Calculate profit if needed
-        if metric == 'profit_musd' and 'profit_musd' not in df_filtered.columns:
-            if 'revenue_musd' in df_filtered.columns and 'budget_musd' in df_filtered.columns:
+        if metric == 'profit_musd' and 'profit_musd' not in columns:
+            if 'revenue_musd' in columns and 'budget_musd' in columns:
                 df_filtered = df_filtered.withColumn(
                     'profit_musd',
                     F.col('revenue_musd') - F.col('budget_musd')
                 )
+                columns.add('profit_musd')
         
         # Calculate ROI if needed
-        if metric == 'roi' and 'roi' not in df_filtered.columns:
-            if 'revenue_musd' in df_filtered.columns and 'budget_musd' in df_filtered.columns:
+        if metric == 'roi' and 'roi' not in columns:
+            if 'revenue_musd' in columns and 'budget_musd' in columns:
                 # ROI = (Revenue - Budget) / Budget * 100
                 # Avoid division by zero
                 df_filtered = df_filtered.withColumn(
@@ -84,31 +101,14 @@ class SparkKPICalculator:
                         ((F.col('revenue_musd') - F.col('budget_musd')) / F.col('budget_musd') * 100)
                     ).otherwise(None)
                 )
+                columns.add('roi')
         
         # Apply filter if provided
         if filter_condition is not None:
             df_filtered = df_filtered.filter(filter_condition)
         
         # Remove rows where metric is null
-        if metric in df_filtered.columns:
-            df_filtered = df_filtered.filter(F.col(metric).isNotNull())
-        else:
-            # If metric doesn't exist, return empty DataFrame
-            logger.warning(f"Metric '{metric}' not found in DataFrame")
-            return self.spark.createDataFrame([], schema="rank INT, title STRING")
-        
-        # Sort by metric
-        if ascending:
-            df_sorted = df_filtered.orderBy(F.col(metric).asc())
-        else:
-            df_sorted = df_filtered.orderBy(F.col(metric).desc())
-        
-        # Select top N
-        df_top = df_sorted.limit(top_n)
-        
-        # Add rank column using row_number
-        window_spec = Window.orderBy(F.lit(1))  # Maintain the order from sorting
-        df_top = df_top.withColumn('rank', F.row_number().over(window_spec))
+        df_filtered = df_filtered.filter(F.col(metric).isNotNull())
         
         # Determine display columns
         if display_columns is None:
@@ -131,9 +131,26 @@ class SparkKPICalculator:
             # Build final column list (avoid duplicates)
             display_columns = base_cols + [
                 col for col in optional_cols 
-                if col not in base_cols and col in df_top.columns
+                if col not in base_cols and col in columns
             ]
         
+        # Project before sorting so the top-N heap (TakeOrderedAndProject)
+        # only carries the displayed columns plus the metric
+        projected_cols = [col for col in display_columns if col != 'rank']
+        if metric not in projected_cols:
+            projected_cols.append(metric)
+        df_projected = df_filtered.select(*projected_cols)
+        
+        # Sort by metric and select top N
+        if ascending:
+            df_top = df_projected.orderBy(F.col(metric).asc()).limit(top_n)
+        else:
+            df_top = df_projected.orderBy(F.col(metric).desc()).limit(top_n)
+        
+        # Add rank column: the at most top_n rows are numbered on the driver
+        # in sort order, without a Window
+        df_top = add_rank_column(df_top)
+        
         # Select only the display columns
         result = df_top.select(*display_columns)
         
@@ -9,19 +9,98 @@ This module handles cleaning raw TMDB API data using PySpark:
 - Feature engineering
 """
 
+from pyspark import StorageLevel
 from pyspark.sql import DataFrame, SparkSession
 from pyspark.sql import functions as F
-from pyspark.sql.types import DateType, DoubleType, IntegerType
+from pyspark.sql.types import (
+    ArrayType, DateType, DoubleType, IntegerType, LongType,
+    StringType, StructField, StructType
+)
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Optional
 import logging
+import os
+import shutil
+
+from ..utils.helpers import get_all_json_files
 
 logger = logging.getLogger(__name__)
 
+# TMDB movie genre vocabulary; each genre gets one bit in the genre_mask column
+GENRES = [
+    'Action', 'Adventure', 'Animation', 'Comedy', 'Crime', 'Documentary',
+    'Drama', 'Family', 'Fantasy', 'History', 'Horror', 'Music', 'Mystery',
+    'Romance', 'Science Fiction', 'TV Movie', 'Thriller', 'War', 'Western'
+]
+GENRE_BITS = {genre: 1 << i for i, genre in enumerate(GENRES)}
+
+# Columns removed by drop_irrelevant_columns
+_COLS_TO_DROP = frozenset({
+    'adult', 'imdb_id', 'original_title', 'video', 'homepage',
+    'backdrop_path', 'poster_path', 'origin_country'
+})
+
+# Text placeholders nulled by clean_datatypes (compared lowercased)
+_TEXT_PLACEHOLDERS = ('no data', 'no overview', 'n/a', 'nan')
+
+# Column order of the cleaned output
+_DESIRED_ORDER = (
+    'id', 'title', 'tagline', 'release_date', 'genres', 'genre_mask', 'collection_name',
+    'original_language', 'budget_musd', 'revenue_musd', 'profit_musd', 'roi',
+    'production_companies',
+    'production_countries', 'vote_count', 'vote_average', 'popularity',
+    'runtime', 'overview', 'spoken_languages',
+    'cast', 'cast_size', 'director', 'crew_size', 'release_year', 'keywords'
+)
+
+# Schema of a TMDB /movie/{id} response with credits and keywords appended.
+# Reading with an explicit schema skips Spark's inference pass over the files,
+# and only the sub-fields used by the pipeline are declared, so the parser
+# skips everything else (including the columns drop_irrelevant_columns removes).
+_NAMED = ArrayType(StructType([StructField('name', StringType())]))
+
+TMDB_SCHEMA = StructType([
+    StructField('belongs_to_collection', StructType([
+        StructField('name', StringType()),
+    ])),
+    StructField('budget', LongType()),
+    StructField('genres', _NAMED),
+    StructField('id', LongType()),
+    StructField('original_language', StringType()),
+    StructField('overview', StringType()),
+    StructField('popularity', DoubleType()),
+    StructField('production_companies', _NAMED),
+    StructField('production_countries', _NAMED),
+    StructField('release_date', StringType()),
+    StructField('revenue', LongType()),
+    StructField('runtime', LongType()),
+    StructField('spoken_languages', _NAMED),
+    StructField('status', StringType()),
+    StructField('tagline', StringType()),
+    StructField('title', StringType()),
+    StructField('vote_average', DoubleType()),
+    StructField('vote_count', LongType()),
+    StructField('credits', StructType([
+        StructField('cast', _NAMED),
+        StructField('crew', ArrayType(StructType([
+            StructField('name', StringType()),
+            StructField('job', StringType()),
+        ]))),
+    ])),
+    StructField('keywords', StructType([
+        StructField('keywords', _NAMED),
+    ])),
+])
+
 
 class SparkMovieDataCleaner:
     """
     Handles data cleaning and preprocessing for TMDB movie data using PySpark.
     """
     
+    __slots__ = ('spark', 'config', '_filtered')
+    
     def __init__(self, spark: SparkSession = None, config=None):
         """
         Initialize the Spark cleaner.
@@ -32,13 +111,34 @@ class SparkMovieDataCleaner:
         """
         self.spark = spark
         self.config = config or {}
+        # Filtered intermediate persisted by clean_all, freed by release()
+        self._filtered = None
     
-    def load_raw_data(self, raw_data_path: str) -> DataFrame:
+    def load_raw_data(
+        self,
+        raw_data_path: str,
+        schema: Optional[StructType] = TMDB_SCHEMA,
+        small_files: bool = False,
+        cache_path: Optional[str] = None,
+        threaded: bool = False
+    ) -> DataFrame:
         """
         Load raw JSON files from the specified path using Spark.
         
         Args:
             raw_data_path (str): Path to raw data directory
+            schema (StructType, optional): Schema of the JSON records. Defaults to
+                TMDB_SCHEMA; pass None to let Spark infer it (an extra pass)
+            small_files (bool): Read the files as binary and parse them with
+                from_json. Faster for thousands of small one-movie files, as
+                files are packed into partitions instead of parsed one by one.
+                Requires a schema
+            cache_path (str, optional): Parquet snapshot of the parsed raw data.
+                Read instead of the JSON files if it exists, otherwise written
+                after parsing. Delete it to pick up new raw files
+            threaded (bool): Read the files on the driver with a thread pool and
+                hand the contents to Spark as one parallelized dataset. Suited
+                to a local raw directory of small-to-medium size
             
         Returns:
             DataFrame: Spark DataFrame with raw data
@@ -46,15 +146,85 @@ class SparkMovieDataCleaner:
         logger.info("Loading raw data...")
         logger.info(f"Raw data path: {raw_data_path}")
         
-        # Read JSON files with multiline option for TMDB API format
-        df = self.spark.read.option("multiLine", "true").json(f"{raw_data_path}/*.json")
+        if cache_path is not None and os.path.exists(cache_path):
+            logger.info(f"Reading raw data snapshot from {cache_path}")
+            return self.spark.read.parquet(cache_path)
         
-        count = df.count()
-        logger.info(f"Loaded {count} movies")
+        if threaded:
+            df = self._load_json_threaded(raw_data_path, schema)
+        elif small_files and schema is not None:
+            df = self._load_small_json_files(raw_data_path, schema)
+        else:
+            # Read JSON files with multiline option for TMDB API format
+            # Malformed files are dropped at parse time instead of surfacing as null rows
+            reader = self.spark.read.option("multiLine", "true").option("mode", "DROPMALFORMED")
+            if schema is not None:
+                reader = reader.schema(schema)
+            df = reader.json(f"{raw_data_path}/*.json")
+        
+        # Counting runs a full job, so only do it when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Loaded {df.count()} movies")
+        logger.info(f"Loaded {df.rdd.getNumPartitions()} partitions")
         logger.info(f"Initial columns: {len(df.columns)}")
         
+        if cache_path is not None:
+            df.write.mode('overwrite').option('compression', 'snappy').parquet(cache_path)
+            logger.info(f"Saved raw data snapshot to {cache_path}")
+            df = self.spark.read.parquet(cache_path)
+        
         return df
     
+    def _load_small_json_files(self, raw_data_path: str, schema: StructType) -> DataFrame:
+        """
+        Load one-record JSON files as binary content and parse them natively.
+        
+        Args:
+            raw_data_path (str): Path to raw data directory
+            schema (StructType): Schema of the JSON records
+            
+        Returns:
+            DataFrame: Spark DataFrame with raw data
+        """
+        files = self.spark.read.format('binaryFile') \
+            .option('pathGlobFilter', '*.json') \
+            .load(raw_data_path)
+        
+        # In PERMISSIVE mode from_json turns a file that fails to parse into a
+        # struct of all-null fields, so drop rows without an id (as
+        # DROPMALFORMED does on the default path)
+        parsed = files.select(
+            F.from_json(F.col('content').cast('string'), schema).alias('movie')
+        ).filter(F.col('movie.id').isNotNull())
+        
+        return parsed.select('movie.*')
+    
+    def _load_json_threaded(self, raw_data_path: str, schema: Optional[StructType]) -> DataFrame:
+        """
+        Read local JSON files concurrently on the driver and parse them with Spark.
+        
+        File reads are I/O bound, so threads overlap them despite the GIL.
+        
+        Args:
+            raw_data_path (str): Path to a local raw data directory
+            schema (StructType, optional): Schema of the JSON records
+            
+        Returns:
+            DataFrame: Spark DataFrame with raw data
+        """
+        files = get_all_json_files(raw_data_path)
+        
+        with ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 4) as pool:
+            contents = list(pool.map(lambda path: path.read_text(encoding='utf-8'), files))
+        
+        sc = self.spark.sparkContext
+        rdd = sc.parallelize(contents, numSlices=max(1, min(len(contents), sc.defaultParallelism * 4)))
+        
+        reader = self.spark.read.option("mode", "DROPMALFORMED")
+        if schema is not None:
+            reader = reader.schema(schema)
+        return reader.json(rdd)
+    
     def drop_irrelevant_columns(self, df: DataFrame) -> DataFrame:
         """
         Drop columns that are not needed for analysis.
@@ -67,11 +237,8 @@ class SparkMovieDataCleaner:
         """
         logger.info("Dropping irrelevant columns...")
         
-        cols_to_drop = ['adult', 'imdb_id', 'original_title', 'video', 'homepage', 
-                        'backdrop_path', 'poster_path', 'origin_country']
-        
-        # Only drop columns that exist
-        existing_cols_to_drop = [col for col in cols_to_drop if col in df.columns]
+        # Only drop columns that exist (df.columns is fetched once)
+        existing_cols_to_drop = [col for col in df.columns if col in _COLS_TO_DROP]
         
         df_clean = df.drop(*existing_cols_to_drop)
         
@@ -95,42 +262,38 @@ class SparkMovieDataCleaner:
         """
         logger.info("Flattening nested JSON columns...")
         
+        columns = set(df.columns)
+        exprs = {}
+        
         # Extract collection name: belongs_to_collection.name
-        if 'belongs_to_collection' in df.columns:
-            df = df.withColumn('collection_name', F.col('belongs_to_collection.name'))
+        if 'belongs_to_collection' in columns:
+            exprs['collection_name'] = F.col('belongs_to_collection.name')
         
         # Helper to extract names from array of structs: transform array -> get names -> array_join
-        def extract_names(col_name):
+        def extract_names(array_col):
             return F.array_join(
-                F.transform(F.col(col_name), lambda x: x['name']), 
+                F.transform(array_col, lambda x: x['name']), 
                 '|'
             )
-
-        # Extract genres
-        if 'genres' in df.columns:
-            df = df.withColumn('genres', extract_names('genres'))
-        
-        # Extract production countries
-        if 'production_countries' in df.columns:
-            df = df.withColumn('production_countries', extract_names('production_countries'))
         
-        # Extract production companies
-        if 'production_companies' in df.columns:
-            df = df.withColumn('production_companies', extract_names('production_companies'))
+        # Extract genres, sorted on the name array before the single join
+        if 'genres' in columns:
+            exprs['genres'] = F.array_join(
+                F.array_sort(F.transform(F.col('genres'), lambda x: x['name'])),
+                '|'
+            )
         
-        # Extract spoken languages
-        if 'spoken_languages' in df.columns:
-            df = df.withColumn('spoken_languages', extract_names('spoken_languages'))
+        # Extract production countries/companies and spoken languages
+        for col_name in ['production_countries', 'production_companies', 'spoken_languages']:
+            if col_name in columns:
+                exprs[col_name] = extract_names(F.col(col_name))
         
         # Extract keywords (keywords.keywords is the array)
-        if 'keywords' in df.columns:
-            df = df.withColumn(
-                'keywords', 
-                F.array_join(
-                    F.transform(F.col('keywords.keywords'), lambda x: x['name']), 
-                    '|'
-                )
-            )
+        if 'keywords' in columns:
+            exprs['keywords'] = extract_names(F.col('keywords.keywords'))
+        
+        # One projection for all flattened columns
+        df = df.withColumns(exprs)
         
         logger.info("Nested columns flattened successfully")
         
@@ -148,6 +311,9 @@ class SparkMovieDataCleaner:
         """
         logger.info("Cleaning datatypes...")
         
+        columns = set(df.columns)
+        exprs = {}
+        
         # Convert numeric columns
         numeric_cols = {
             'budget': 'long',
@@ -160,38 +326,35 @@ class SparkMovieDataCleaner:
         }
         
         for col_name, dtype in numeric_cols.items():
-            if col_name in df.columns:
-                df = df.withColumn(col_name, F.col(col_name).cast(dtype))
+            if col_name in columns:
+                exprs[col_name] = F.col(col_name).cast(dtype)
         
         # Convert release_date to date type
-        if 'release_date' in df.columns:
-            df = df.withColumn('release_date', F.to_date(F.col('release_date')))
+        if 'release_date' in columns:
+            exprs['release_date'] = F.to_date(F.col('release_date'))
         
         # Replace zero values with null in budget/revenue/runtime (zeros are unrealistic)
         for col_name in ['budget', 'revenue', 'runtime']:
-            if col_name in df.columns:
-                df = df.withColumn(
-                    col_name,
-                    F.when(F.col(col_name) == 0, None).otherwise(F.col(col_name))
-                )
+            if col_name in exprs:
+                exprs[col_name] = F.when(exprs[col_name] != 0, exprs[col_name])
         
-        # Create million USD columns
-        if 'budget' in df.columns:
-            df = df.withColumn('budget_musd', F.col('budget') / 1_000_000)
+        # Create million USD columns from the same expressions (zeros already nulled)
+        if 'budget' in exprs:
+            exprs['budget_musd'] = exprs['budget'] / 1_000_000
         
-        if 'revenue' in df.columns:
-            df = df.withColumn('revenue_musd', F.col('revenue') / 1_000_000)
+        if 'revenue' in exprs:
+            exprs['revenue_musd'] = exprs['revenue'] / 1_000_000
         
-        # Handle text placeholders
-        placeholders = ['No Data', 'No Overview', 'n/a', 'nan']
+        # Handle text placeholders (compared lowercased, so 'NaN' or 'N/A' match too)
+        placeholders = list(_TEXT_PLACEHOLDERS)
         for col_name in ['overview', 'tagline']:
-            if col_name in df.columns:
+            if col_name in columns:
                 # Replace placeholders with null
-                condition = F.col(col_name).isin(placeholders)
-                df = df.withColumn(
-                    col_name,
-                    F.when(condition, None).otherwise(F.col(col_name))
-                )
+                condition = F.lower(F.col(col_name)).isin(placeholders)
+                exprs[col_name] = F.when(condition, None).otherwise(F.col(col_name))
+        
+        # Apply all conversions in a single projection
+        df = df.withColumns(exprs)
         
         logger.info("Datatypes cleaned.")
         
@@ -213,10 +376,9 @@ class SparkMovieDataCleaner:
             DataFrame: Filtered DataFrame
         """
         logger.info("Filtering data...")
-        initial_count = df.count()
-        
-        # Drop duplicates based on ID
-        df = df.dropDuplicates(['id'])
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            initial_count = df.count()
         
         # Drop rows with missing ID or title
         df = df.filter(F.col('id').isNotNull() & F.col('title').isNotNull())
@@ -227,11 +389,16 @@ class SparkMovieDataCleaner:
             # status column kept during processing but dropped later if needed
             df = df.drop('status') 
         
-        final_count = df.count()
-        rows_removed = initial_count - final_count
+        # Drop duplicates based on ID. This runs last so only surviving rows
+        # are shuffled; Spark plans it as a first() aggregate with a partial
+        # (map-side) step, so within-partition duplicates never leave the task
+        df = df.dropDuplicates(['id'])
         
-        logger.info(f"Rows removed: {rows_removed}")
-        logger.info(f"Final count: {final_count}")
+        # Row counts cost two full jobs, so only compute them when debugging
+        if debug:
+            final_count = df.count()
+            logger.debug(f"Rows removed: {initial_count - final_count}")
+            logger.debug(f"Final count: {final_count}")
         
         return df
     
@@ -242,6 +409,7 @@ class SparkMovieDataCleaner:
         Adds:
         - cast, cast_size, director, crew_size (from credits)
         - release_year (from release_date)
+        - profit_musd, roi (from budget_musd and revenue_musd)
         
         Args:
             df (DataFrame): Input Spark DataFrame
@@ -251,8 +419,11 @@ class SparkMovieDataCleaner:
         """
         logger.info("Performing feature engineering...")
         
+        columns = set(df.columns)
+        exprs = {}
+        
         # Extract cast and crew information from credits
-        if 'credits' in df.columns:
+        if 'credits' in columns:
             logger.info("Extracting cast and crew information from the 'credits' column.")
             
             # Helper to access cast
@@ -261,43 +432,45 @@ class SparkMovieDataCleaner:
 
             # 1. Cast names (Top 5)
             # Use slice to take top 5, then transform to get names
-            df = df.withColumn(
-                'cast', 
-                F.array_join(
-                    F.transform(F.slice(cast_col, 1, 5), lambda x: x['name']),
-                    '|'
-                )
+            exprs['cast'] = F.array_join(
+                F.transform(F.slice(cast_col, 1, 5), lambda x: x['name']),
+                '|'
             )
             
             # 2. Cast size
-            df = df.withColumn('cast_size', F.size(cast_col))
+            exprs['cast_size'] = F.size(cast_col)
             
             # 3. Director
             # Filter crew array for Job='Director', take first element's name
             directors = F.filter(crew_col, lambda x: x['job'] == 'Director')
-            df = df.withColumn('director', F.element_at(directors, 1)['name'])
+            exprs['director'] = F.element_at(directors, 1)['name']
             
             # 4. Crew size
-            df = df.withColumn('crew_size', F.size(crew_col))
-            
-            logger.info("Cast and crew information successfully extracted.")
+            exprs['crew_size'] = F.size(crew_col)
         else:
             logger.warning("The 'credits' column was not found. Skipping cast/crew extraction.")
         
         # Extract release year
-        if 'release_date' in df.columns:
-            logger.info("Extracting the release year from the 'release_date' column.")
-            df = df.withColumn('release_year', F.year(F.col('release_date')))
-            logger.info("Release year successfully extracted.")
+        if 'release_date' in columns:
+            exprs['release_year'] = F.year(F.col('release_date'))
+        
+        # Profit and ROI are materialized here so downstream KPIs can read them
+        # directly (and Parquet statistics can prune on them)
+        if 'budget_musd' in columns and 'revenue_musd' in columns:
+            exprs['profit_musd'] = F.col('revenue_musd') - F.col('budget_musd')
+            exprs['roi'] = F.when(
+                F.col('budget_musd') > 0,
+                ((F.col('revenue_musd') - F.col('budget_musd')) / F.col('budget_musd') * 100)
+            ).otherwise(None)
         
         # Handle 'nan' string values in text columns
         text_cols = ['tagline', 'title', 'collection_name']
         for col_name in text_cols:
-            if col_name in df.columns:
-                df = df.withColumn(
-                    col_name,
-                    F.when(F.col(col_name) == 'nan', None).otherwise(F.col(col_name))
-                )
+            if col_name in columns:
+                exprs[col_name] = F.when(F.col(col_name) != 'nan', F.col(col_name))
+        
+        # All features are added in a single projection
+        df = df.withColumns(exprs)
         
         logger.info("Feature engineering complete.")
         
@@ -308,6 +481,8 @@ class SparkMovieDataCleaner:
         Sort genres alphabetically within each cell.
         
         For native implementation, we can split, sort_array, and join back.
+        ``clean_all`` does not need this step because ``flatten_nested_columns``
+        already sorts the genre names before joining them.
         
         Args:
             df (DataFrame): Input Spark DataFrame
@@ -331,6 +506,42 @@ class SparkMovieDataCleaner:
         
         return df
     
+    def add_genre_mask(self, df: DataFrame) -> DataFrame:
+        """
+        Pack each movie's genres into a single BIGINT bitmask.
+        
+        Each genre in ``GENRE_BITS`` sets one bit, so "has all of these genres"
+        becomes ``genre_mask & required == required`` instead of one string
+        scan per genre. Genres outside the vocabulary contribute no bits.
+        
+        Args:
+            df (DataFrame): Input Spark DataFrame with pipe-separated 'genres'
+            
+        Returns:
+            DataFrame: DataFrame with an added 'genre_mask' column
+        """
+        if 'genres' not in df.columns:
+            return df
+        
+        logger.info("Computing genre bitmask...")
+        
+        bits = F.create_map(*[F.lit(x) for x in chain(*GENRE_BITS.items())])
+        zero = F.lit(0).cast('bigint')
+        
+        df = df.withColumn(
+            'genre_mask',
+            F.coalesce(
+                F.aggregate(
+                    F.split(F.col('genres'), r'\|'),
+                    zero,
+                    lambda acc, g: acc.bitwiseOR(F.coalesce(bits[g].cast('bigint'), zero))
+                ),
+                zero
+            )
+        )
+        
+        return df
+    
     def finalize_dataframe(self, df: DataFrame) -> DataFrame:
         """
         Reorder columns to desired format.
@@ -343,16 +554,9 @@ class SparkMovieDataCleaner:
         """
         logger.info("Finalizing dataframe...")
         
-        desired_order = [
-            'id', 'title', 'tagline', 'release_date', 'genres', 'collection_name',
-            'original_language', 'budget_musd', 'revenue_musd', 'production_companies',
-            'production_countries', 'vote_count', 'vote_average', 'popularity',
-            'runtime', 'overview', 'spoken_languages',
-            'cast', 'cast_size', 'director', 'crew_size', 'release_year', 'keywords'
-        ]
-        
         # Select only existing columns in desired order
-        final_cols = [col for col in desired_order if col in df.columns]
+        columns = set(df.columns)
+        final_cols = [col for col in _DESIRED_ORDER if col in columns]
         df_final = df.select(*final_cols)
         
         logger.info(f"Final columns: {df_final.columns}")
@@ -374,23 +578,31 @@ class SparkMovieDataCleaner:
         logger.info("Starting complete data cleaning pipeline")
         logger.info("=" * 60)
         
+        # Free the intermediate cached by a previous run
+        self.release()
+        
         # Step 1: Drop irrelevant columns
         df = self.drop_irrelevant_columns(df)
         
-        # Step 2: Flatten nested columns
+        # Step 2: Filter data on the raw columns (id, title and status exist
+        # before flattening), so later steps only see surviving rows. Keep the
+        # result so later actions (e.g. the final write) do not re-parse the
+        # raw JSON; call release() once the cleaned DataFrame is no longer used
+        df = self.filter_data(df)
+        df = df.persist(StorageLevel.MEMORY_AND_DISK)
+        self._filtered = df
+        
+        # Step 3: Flatten nested columns
         df = self.flatten_nested_columns(df)
         
-        # Step 3: Clean datatypes
+        # Step 4: Clean datatypes
         df = self.clean_datatypes(df)
         
-        # Step 4: Filter data
-        df = self.filter_data(df)
-        
         # Step 5: Engineer features
         df = self.engineer_features(df)
         
-        # Step 6: Sort genres
-        df = self.sort_genres(df)
+        # Step 6: Genre bitmask (genres were sorted while flattening)
+        df = self.add_genre_mask(df)
         
         # Step 7: Finalize
         df = self.finalize_dataframe(df)
@@ -401,6 +613,54 @@ class SparkMovieDataCleaner:
         
         return df
     
+    def build_cast_index(self, df: DataFrame) -> DataFrame:
+        """
+        Build an actor -> movie id lookup table from the cleaned data.
+        
+        The index has one row per (id, actor) and is small enough to be
+        broadcast, so actor searches can join against it instead of scanning
+        the full cast string of every movie.
+        
+        Args:
+            df (DataFrame): Cleaned Spark DataFrame with 'id' and 'cast' columns
+            
+        Returns:
+            DataFrame: Columns id, actor, actor_lower
+        """
+        logger.info("Building cast index...")
+        
+        cast_index = df.select(
+            'id',
+            F.explode(F.split(F.col('cast'), r'\|')).alias('actor')
+        ).filter(F.col('actor') != '') \
+         .withColumn('actor_lower', F.lower(F.col('actor')))
+        
+        return cast_index
+    
+    def add_array_columns(self, df: DataFrame) -> DataFrame:
+        """
+        Add native array versions of the pipe-separated list columns.
+        
+        Adds ``genres_arr``, ``cast_arr`` and ``keywords_arr`` (array<string>),
+        which Parquet stores as LIST columns, so readers can use array
+        functions such as ``array_contains`` instead of parsing strings.
+        
+        Args:
+            df (DataFrame): Cleaned Spark DataFrame
+            
+        Returns:
+            DataFrame: DataFrame with the added array columns
+        """
+        for col_name in ['genres', 'cast', 'keywords']:
+            if col_name in df.columns and f'{col_name}_arr' not in df.columns:
+                df = df.withColumn(
+                    f'{col_name}_arr',
+                    F.when(F.col(col_name) != '', F.split(F.col(col_name), r'\|'))
+                     .otherwise(F.array().cast('array<string>'))
+                )
+        
+        return df
+    
     def save_cleaned_data(self, df: DataFrame, output_path: str):
         """
         Save cleaned data to Parquet and CSV formats.
@@ -411,16 +671,35 @@ class SparkMovieDataCleaner:
         """
         logger.info(f"Saving cleaned data to {output_path}...")
         
-        # Save as Parquet (efficient for Spark)
+        # Save as Parquet (efficient for Spark), partitioned by release year
+        # so year-range filters only list the matching directories. List
+        # columns are also stored as native arrays (CSV cannot hold them).
         parquet_path = f"{output_path}/movies_cleaned.parquet"
-        df.write.mode('overwrite').parquet(parquet_path)
+        writer = self.add_array_columns(df).write.mode('overwrite')
+        if 'release_year' in df.columns:
+            writer = writer.partitionBy('release_year')
+        writer.option('compression', 'snappy').parquet(parquet_path)
         logger.info(f"Saved to {parquet_path}")
         
-        # Save as CSV (single file for compatibility)
+        # Save as CSV (single file for compatibility). The cleaned table is
+        # small, so write it from the driver instead of funnelling the whole
+        # dataset through one Spark task with coalesce(1)
         csv_path = f"{output_path}/movies_cleaned.csv"
-        df.coalesce(1).write.mode('overwrite') \
-          .option('header', 'true') \
-          .csv(csv_path)
+        if os.path.isdir(csv_path):
+            # Replace output left by the old Spark CSV writer (a directory)
+            shutil.rmtree(csv_path)
+        df.toPandas().to_csv(csv_path, index=False)
         logger.info(f"Saved to {csv_path}")
         
         logger.info("Data saved successfully.")
+    
+    def release(self) -> None:
+        """
+        Unpersist the filtered intermediate cached by clean_all.
+        
+        DataFrames returned by clean_all stay usable, but later actions on
+        them recompute from the raw data. Safe to call more than once.
+        """
+        if self._filtered is not None:
+            self._filtered.unpersist()
+            self._filtered = None
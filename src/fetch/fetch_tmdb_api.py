@@ -4,6 +4,7 @@ Fetch movie data from TMDB API and save as raw JSON files.
 import os
 import time
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 from typing import List, Optional
 from dotenv import load_dotenv
@@ -40,6 +41,12 @@ class TMDBFetcher:
         self.rate_limit = self.config['api']['rate_limit_delay']
         self.raw_data_path = Path(self.config['paths']['raw_data'])
         self.raw_data_path.mkdir(parents=True, exist_ok=True)
+        
+        # One pooled session so batch fetches reuse the TLS connection
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def fetch_movie(self, movie_id: int, skip_existing: bool = True) -> Optional[dict]:
         """
@@ -65,7 +72,7 @@ class TMDBFetcher:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=self.timeout)
+            response = self.session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
             
@@ -3,7 +3,7 @@ Utility modules for TMDB Spark Analysis project.
 """
 
 from .helpers import load_config, load_json, save_json, setup_logging
-from .spark_utils import get_spark_session, stop_spark_session
+from .spark_utils import get_spark_session, stop_spark_session, add_rank_column
 
 __all__ = [
     'load_config',
@@ -11,5 +11,6 @@ __all__ = [
     'save_json',
     'setup_logging',
     'get_spark_session',
-    'stop_spark_session'
+    'stop_spark_session',
+    'add_rank_column'
 ]
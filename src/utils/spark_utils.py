@@ -2,14 +2,44 @@
 Spark session management utilities for TMDB Analysis project.
 """
 
-from pyspark.sql import SparkSession
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql.types import IntegerType, StructField, StructType
 from typing import Optional, Dict, Any
+import atexit
 import logging
 from .helpers import load_config
 
 
 logger = logging.getLogger(__name__)
 
+# Performance defaults applied when neither config.yaml nor config_overrides
+# set the key (keys are given without the "spark." prefix, as in config.yaml)
+DEFAULT_SPARK_CONFIG: Dict[str, Any] = {
+    'sql.adaptive.enabled': True,
+    'sql.adaptive.skewJoin.enabled': True,
+    'sql.adaptive.coalescePartitions.enabled': True,
+    'sql.parquet.enableVectorizedReader': True,
+    'sql.parquet.columnarReaderBatchSize': 8192,
+    'serializer': 'org.apache.spark.serializer.KryoSerializer',
+}
+
+# Session created or found by get_spark_session, so repeat calls skip the py4j lookup
+_ACTIVE: Optional[SparkSession] = None
+
+
+def _cached_session() -> Optional[SparkSession]:
+    """
+    Get the cached SparkSession, falling back to the JVM's active session.
+    
+    Returns:
+        SparkSession instance, or None if no usable session exists
+    """
+    global _ACTIVE
+    # A stopped context drops its JVM handle, so this check stays in Python
+    if _ACTIVE is None or _ACTIVE.sparkContext._jsc is None:
+        _ACTIVE = SparkSession.getActiveSession()
+    return _ACTIVE
+
 
 def get_spark_session(
     app_name: str = "TMDB_Analysis",
@@ -22,6 +52,9 @@ def get_spark_session(
     This function implements a singleton pattern - if a SparkSession already exists,
     it returns that session rather than creating a new one.
     
+    Keys in DEFAULT_SPARK_CONFIG (AQE, vectorized Parquet, Kryo) are
+    applied when not set; a value in config.yaml or config_overrides wins.
+    
     Args:
         app_name: Name of the Spark application
         config_path: Path to config.yaml file containing Spark settings
@@ -34,8 +67,10 @@ def get_spark_session(
         >>> spark = get_spark_session()
         >>> df = spark.read.json("data/raw/movies.json")
     """
+    global _ACTIVE
+    
     # Check if session already exists
-    existing_session = SparkSession.getActiveSession()
+    existing_session = _cached_session()
     if existing_session is not None:
         logger.info(f"Returning existing SparkSession: {existing_session.sparkContext.appName}")
         return existing_session
@@ -53,6 +88,12 @@ def get_spark_session(
     if config_overrides:
         spark_config.update(config_overrides)
     
+    # Fill in performance defaults for keys that are not configured
+    configured = {key[len('spark.'):] if key.startswith('spark.') else key for key in spark_config}
+    for key, value in DEFAULT_SPARK_CONFIG.items():
+        if key not in configured:
+            spark_config[key] = value
+    
     # Build SparkSession
     builder = SparkSession.builder
     
@@ -72,6 +113,12 @@ def get_spark_session(
     
     # Create session
     spark = builder.getOrCreate()
+    _ACTIVE = spark
+    
+    # Release the session this module created on interpreter exit; sessions
+    # managed by the caller (notebooks, test fixtures) are left alone
+    atexit.unregister(stop_spark_session)
+    atexit.register(stop_spark_session)
     
     logger.info(f"Created new SparkSession: {app_name}")
     logger.info(f"Spark version: {spark.version}")
@@ -90,12 +137,15 @@ def stop_spark_session() -> None:
     Example:
         >>> stop_spark_session()
     """
-    session = SparkSession.getActiveSession()
+    global _ACTIVE
+    
+    session = _cached_session()
     if session is not None:
         logger.info(f"Stopping SparkSession: {session.sparkContext.appName}")
         session.stop()
     else:
         logger.info("No active SparkSession to stop")
+    _ACTIVE = None
 
 
 def get_spark_context(spark: Optional[SparkSession] = None):
@@ -112,8 +162,32 @@ def get_spark_context(spark: Optional[SparkSession] = None):
         RuntimeError: If no active SparkSession exists
     """
     if spark is None:
-        spark = SparkSession.getActiveSession()
+        spark = _cached_session()
         if spark is None:
             raise RuntimeError("No active SparkSession. Call get_spark_session() first.")
     
     return spark.sparkContext
+
+
+def add_rank_column(df: DataFrame, rank_col: str = 'rank') -> DataFrame:
+    """
+    Prepend a 1-based rank column that follows the row order of a small result.
+    
+    The rows are collected and numbered on the driver, so only use this on
+    an already limited result (e.g. ``orderBy(...).limit(n)``). Unlike
+    monotonically_increasing_id, the ranks stay 1..N however the plan is
+    partitioned, and no single-partition Window is needed.
+    
+    Args:
+        df: Sorted DataFrame with at most a few hundred rows
+        rank_col: Name of the rank column
+        
+    Returns:
+        DataFrame with rank_col first, followed by the columns of df
+        
+    Example:
+        >>> top = add_rank_column(df.orderBy(F.col('revenue').desc()).limit(10))
+    """
+    schema = StructType([StructField(rank_col, IntegerType(), False)] + df.schema.fields)
+    rows = [(rank, *row) for rank, row in enumerate(df.collect(), start=1)]
+    return df.sparkSession.createDataFrame(rows, schema)
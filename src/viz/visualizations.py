@@ -5,8 +5,10 @@ This module provides functions for creating visualizations of movie performance,
 trends, and comparisons using Matplotlib and Seaborn.
 """
 
+from pyspark import StorageLevel
 from pyspark.sql import DataFrame
 from pyspark.sql import functions as F
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -25,6 +27,33 @@ sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 6)
 
 
+def _linfit(x: np.ndarray, y: np.ndarray, weights: np.ndarray) -> Tuple[float, float]:
+    """
+    Weighted least-squares line fit in closed form.
+    
+    Equivalent to ``np.polyfit(x, y, 1, w=np.sqrt(weights))`` but computed from
+    the weighted sums directly, without the general LAPACK solver.
+    
+    Args:
+        x: Independent values
+        y: Dependent values
+        weights: Weight of each point (e.g. number of movies in a bin)
+        
+    Returns:
+        Tuple of (slope, intercept)
+    """
+    sw = weights.sum()
+    sx = (weights * x).sum()
+    sy = (weights * y).sum()
+    sxx = (weights * x * x).sum()
+    sxy = (weights * x * y).sum()
+    
+    denom = sw * sxx - sx * sx
+    slope = (sw * sxy - sx * sy) / denom if denom else 0.0
+    intercept = (sy - slope * sx) / sw
+    return slope, intercept
+
+
 class MovieVisualizer:
     """
     Handles visualization of movie data using Matplotlib and Seaborn.
@@ -41,51 +70,163 @@ class MovieVisualizer:
         """
         self.spark = spark
     
+    def _add_derived_columns(self, df: DataFrame) -> DataFrame:
+        """
+        Add release_year, roi and movie_type columns if they are missing.
+        
+        Args:
+            df: Spark DataFrame with movie data
+            
+        Returns:
+            DataFrame with derived columns
+        """
+        columns = set(df.columns)
+        
+        if 'release_year' not in columns and 'release_date' in columns:
+            df = df.withColumn('release_year', F.year(F.col('release_date')))
+        
+        if 'roi' not in columns:
+            df = df.withColumn(
+                'roi',
+                F.when(
+                    F.col('budget_musd') > 0,
+                    ((F.col('revenue_musd') - F.col('budget_musd')) / F.col('budget_musd') * 100)
+                ).otherwise(None)
+            )
+        
+        if 'movie_type' not in columns and 'collection_name' in columns:
+            df = df.withColumn(
+                'movie_type',
+                F.when(F.col('collection_name').isNotNull(), 'Franchise').otherwise('Standalone')
+            )
+        
+        return df
+    
+    @staticmethod
+    def _project(df: DataFrame, cols) -> DataFrame:
+        """
+        Keep only the given columns that exist in the DataFrame.
+        
+        Args:
+            df: Spark DataFrame with movie data
+            cols: Column names used by a plot (source or derived)
+            
+        Returns:
+            Projected DataFrame
+        """
+        columns = set(df.columns)
+        return df.select(*[col for col in cols if col in columns])
+    
+    def prepare(self, df: DataFrame) -> DataFrame:
+        """
+        Compute derived plot columns once and persist the result for reuse.
+        
+        The returned DataFrame can be passed to all plot methods, which then
+        read the cached columns instead of recomputing them from the source.
+        Call ``unpersist()`` on it when done plotting.
+        
+        Args:
+            df: Spark DataFrame with movie data
+            
+        Returns:
+            Persisted DataFrame with release_year, roi and movie_type columns
+            
+        Example:
+            >>> prepared = viz.prepare(df)
+            >>> viz.plot_roi_by_genre(prepared)
+            >>> viz.plot_franchise_vs_standalone(prepared)
+            >>> prepared.unpersist()
+        """
+        prepared = self._add_derived_columns(df).persist(StorageLevel.MEMORY_AND_DISK)
+        
+        # Materialize the cache so the first plot does not pay for it
+        count = prepared.count()
+        logger.info(f"Prepared and cached {count} movies for plotting")
+        
+        return prepared
+    
     def plot_revenue_vs_budget(
         self,
         df: DataFrame,
         figsize: Tuple[int, int] = (12, 8),
-        save_path: Optional[str] = None
+        save_path: Optional[str] = None,
+        bins: int = 250,
+        ax: Optional[plt.Axes] = None
     ) -> plt.Figure:
         """
         Plot Revenue vs Budget Trends with scatter plot and trend line.
         
+        Movies are binned on a ``bins`` x ``bins`` budget/revenue grid in Spark,
+        so only one row per occupied cell is collected. Each cell is drawn at
+        its center, sized by movie count and colored by mean release year.
+        
         Args:
-            df: Spark DataFrame with movie data
+            df: Spark DataFrame with movie data (optionally from ``prepare``)
             figsize: Figure size (width, height)
-            save_path: Optional path to save the figure
+            save_path: Optional path to save the figure (the figure is closed after saving)
+            bins: Number of bins per axis
+            ax: Optional Axes to draw on (a new figure is created otherwise)
             
         Returns:
             Matplotlib figure object
         """
         # Prepare data in Spark
-        plot_df = df.select('title', 'budget_musd', 'revenue_musd', 'release_year') \
+        df = self._project(df, ['budget_musd', 'revenue_musd', 'release_year', 'release_date'])
+        plot_df = self._add_derived_columns(df).select('budget_musd', 'revenue_musd', 'release_year') \
                     .filter((F.col('budget_musd').isNotNull()) & 
                            (F.col('revenue_musd').isNotNull()) &
                            (F.col('budget_musd') > 0) &
                            (F.col('revenue_musd') > 0))
         
-        # Convert to pandas for plotting
-        pdf = plot_df.toPandas()
+        # Axis ranges determine the bin widths
+        limits = plot_df.agg(
+            F.max('budget_musd').alias('max_budget'),
+            F.max('revenue_musd').alias('max_revenue')
+        ).first()
+        max_budget = limits['max_budget'] or 1.0
+        max_revenue = limits['max_revenue'] or 1.0
+        budget_w = max_budget / bins
+        revenue_w = max_revenue / bins
+        
+        # 2D histogram in Spark; only occupied cells reach the driver
+        binned = plot_df.groupBy(
+            F.floor(F.col('budget_musd') / budget_w).alias('bx'),
+            F.floor(F.col('revenue_musd') / revenue_w).alias('by')
+        ).agg(
+            F.count('*').alias('n'),
+            F.avg('release_year').alias('release_year')
+        )
+        
+        # Convert to pandas for plotting, then to plain arrays for matplotlib
+        pdf = binned.toPandas()
+        budget = (pdf['bx'].to_numpy(dtype=float) + 0.5) * budget_w
+        revenue = (pdf['by'].to_numpy(dtype=float) + 0.5) * revenue_w
+        counts = pdf['n'].to_numpy(dtype=float)
+        years = pdf['release_year'].to_numpy()
         
         # Create figure
-        fig, ax = plt.subplots(figsize=figsize)
+        if ax is None:
+            fig, ax = plt.subplots(figsize=figsize)
+        else:
+            fig = ax.figure
         
-        # Scatter plot
-        scatter = ax.scatter(pdf['budget_musd'], pdf['revenue_musd'], 
-                           alpha=0.6, s=100, c=pdf['release_year'], 
-                           cmap='viridis', edgecolors='black', linewidth=0.5)
+        # Scatter plot of bin centers, sized by (log) movie count
+        scatter = ax.scatter(budget, revenue, 
+                           alpha=0.6, s=np.log1p(counts) * 20, c=years, 
+                           cmap='viridis', edgecolors='black', linewidth=0.5,
+                           rasterized=True)
         
         # Add diagonal line (break-even line)
-        max_val = max(pdf['budget_musd'].max(), pdf['revenue_musd'].max())
+        max_val = max(max_budget, max_revenue)
         ax.plot([0, max_val], [0, max_val], 'r--', linewidth=2, 
                label='Break-even line', alpha=0.7)
         
-        # Add trend line
-        z = np.polyfit(pdf['budget_musd'], pdf['revenue_musd'], 1)
-        p = np.poly1d(z)
-        ax.plot(pdf['budget_musd'], p(pdf['budget_musd']), 
-               "g-", linewidth=2, label=f'Trend line', alpha=0.7)
+        # Add trend line, weighting each bin as if its movies were separate points
+        slope, intercept = _linfit(budget, revenue, counts)
+        # A straight line only needs its two endpoints
+        xs = np.array([budget.min(), budget.max()])
+        ax.plot(xs, slope * xs + intercept, 
+               "g-", linewidth=2, label='Trend line', alpha=0.7)
         
         # Labels and title
         ax.set_xlabel('Budget (Million USD)', fontsize=12, fontweight='bold')
@@ -95,14 +236,16 @@ class MovieVisualizer:
         ax.grid(True, alpha=0.3)
         
         # Add colorbar
-        cbar = plt.colorbar(scatter, ax=ax)
+        cbar = fig.colorbar(scatter, ax=ax)
         cbar.set_label('Release Year', fontsize=10)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
             logger.info(f"Saved plot to {save_path}")
+            # Release the figure when rendering to file, e.g. in batch runs
+            plt.close(fig)
         
         return fig
     
@@ -111,51 +254,59 @@ class MovieVisualizer:
         df: DataFrame,
         top_n_genres: int = 10,
         figsize: Tuple[int, int] = (14, 8),
-        save_path: Optional[str] = None
+        save_path: Optional[str] = None,
+        ax: Optional[plt.Axes] = None
     ) -> plt.Figure:
         """
         Plot ROI Distribution by Genre using box plots.
         
         Args:
-            df: Spark DataFrame with movie data
+            df: Spark DataFrame with movie data (optionally from ``prepare``)
             top_n_genres: Number of top genres to display
             figsize: Figure size (width, height)
-            save_path: Optional path to save the figure
+            save_path: Optional path to save the figure (the figure is closed after saving)
+            ax: Optional Axes to draw on (a new figure is created otherwise)
             
         Returns:
             Matplotlib figure object
         """
-        # Calculate ROI and explode genres (split pipe-separated values)
-        df_roi = df.withColumn(
-            'roi',
-            F.when(
-                F.col('budget_musd') > 0,
-                ((F.col('revenue_musd') - F.col('budget_musd')) / F.col('budget_musd') * 100)
-            ).otherwise(None)
-        ).filter(F.col('roi').isNotNull())
+        # Only the columns this plot uses travel through the pipeline
+        df = self._project(df, ['genres', 'budget_musd', 'revenue_musd', 'roi'])
+        
+        # Calculate ROI (unless prepared) and explode genres (split pipe-separated values)
+        df_roi = self._add_derived_columns(df).filter(F.col('roi').isNotNull())
         
         # Split genres into array and explode
         df_exploded = df_roi.withColumn('genre', F.explode(F.split(F.col('genres'), '\\|'))) \
                             .select('genre', 'roi')
         
-        # Get top genres by count
-        top_genres = df_exploded.groupBy('genre').count() \
-                                .orderBy(F.col('count').desc()) \
-                                .limit(top_n_genres) \
-                                .select('genre') \
-                                .rdd.flatMap(lambda x: x).collect()
-        
-        # Filter for top genres
-        df_filtered = df_exploded.filter(F.col('genre').isin(top_genres))
+        # Per-genre count and quantiles in one aggregation; only the summary
+        # of the top genres (five numbers each) is collected
+        stats = df_exploded.groupBy('genre').agg(
+            F.count('*').alias('n'),
+            F.percentile_approx('roi', [0.0, 0.25, 0.5, 0.75, 1.0]).alias('q')
+        ).orderBy(F.col('n').desc()) \
+         .limit(top_n_genres)
         
         # Convert to pandas
-        pdf = df_filtered.toPandas()
+        pdf = stats.toPandas()
+        
+        # Box statistics for matplotlib (whiskers span min to max)
+        box_stats = [
+            {'label': genre, 'whislo': q[0], 'q1': q[1], 'med': q[2], 'q3': q[3], 'whishi': q[4]}
+            for genre, q in zip(pdf['genre'], pdf['q'])
+        ]
         
         # Create figure
-        fig, ax = plt.subplots(figsize=figsize)
+        if ax is None:
+            fig, ax = plt.subplots(figsize=figsize)
+        else:
+            fig = ax.figure
         
         # Box plot
-        sns.boxplot(data=pdf, x='genre', y='roi', ax=ax, palette='Set2')
+        boxes = ax.bxp(box_stats, showfliers=False, patch_artist=True)
+        for patch, color in zip(boxes['boxes'], sns.color_palette('Set2', len(box_stats))):
+            patch.set_facecolor(color)
         
         # Rotate x labels
         ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
@@ -167,11 +318,13 @@ class MovieVisualizer:
                     fontsize=14, fontweight='bold', pad=20)
         ax.grid(True, alpha=0.3, axis='y')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
             logger.info(f"Saved plot to {save_path}")
+            # Release the figure when rendering to file, e.g. in batch runs
+            plt.close(fig)
         
         return fig
     
@@ -180,7 +333,8 @@ class MovieVisualizer:
         df: DataFrame,
         min_votes: int = 10,
         figsize: Tuple[int, int] = (12, 8),
-        save_path: Optional[str] = None
+        save_path: Optional[str] = None,
+        ax: Optional[plt.Axes] = None
     ) -> plt.Figure:
         """
         Plot Popularity vs Rating scatter plot.
@@ -189,7 +343,8 @@ class MovieVisualizer:
             df: Spark DataFrame with movie data
             min_votes: Minimum vote count to include
             figsize: Figure size (width, height)
-            save_path: Optional path to save the figure
+            save_path: Optional path to save the figure (the figure is closed after saving)
+            ax: Optional Axes to draw on (a new figure is created otherwise)
             
         Returns:
             Matplotlib figure object
@@ -200,17 +355,33 @@ class MovieVisualizer:
                            (F.col('vote_average').isNotNull()) &
                            (F.col('vote_count') >= min_votes))
         
+        # Marker size scaled to 0..500 by revenue (50 when unknown), computed in
+        # Spark so the raw revenue column is not transferred. The max is a
+        # partially aggregated scalar, so rows are not gathered into a single
+        # window partition
+        max_revenue = plot_df.agg(F.max('revenue_musd').alias('m')).first()['m']
+        plot_df = plot_df.select(
+            'vote_average', 'popularity', 'vote_count',
+            F.coalesce(
+                F.col('revenue_musd') / F.lit(max_revenue) * 500,
+                F.lit(50.0)
+            ).alias('size')
+        )
+        
         # Convert to pandas
         pdf = plot_df.toPandas()
         
         # Create figure
-        fig, ax = plt.subplots(figsize=figsize)
+        if ax is None:
+            fig, ax = plt.subplots(figsize=figsize)
+        else:
+            fig = ax.figure
         
         # Scatter plot with size based on revenue
-        sizes = (pdf['revenue_musd'] / pdf['revenue_musd'].max() * 500).fillna(50)
-        scatter = ax.scatter(pdf['vote_average'], pdf['popularity'], 
-                           alpha=0.6, s=sizes, c=pdf['vote_count'], 
-                           cmap='plasma', edgecolors='black', linewidth=0.5)
+        scatter = ax.scatter(pdf['vote_average'].to_numpy(), pdf['popularity'].to_numpy(), 
+                           alpha=0.6, s=pdf['size'].to_numpy(), c=pdf['vote_count'].to_numpy(), 
+                           cmap='plasma', edgecolors='black', linewidth=0.5,
+                           rasterized=True)
         
         # Labels and title
         ax.set_xlabel('Rating (Vote Average)', fontsize=12, fontweight='bold')
@@ -220,14 +391,16 @@ class MovieVisualizer:
         ax.grid(True, alpha=0.3)
         
         # Add colorbar
-        cbar = plt.colorbar(scatter, ax=ax)
+        cbar = fig.colorbar(scatter, ax=ax)
         cbar.set_label('Vote Count', fontsize=10)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
             logger.info(f"Saved plot to {save_path}")
+            # Release the figure when rendering to file, e.g. in batch runs
+            plt.close(fig)
         
         return fig
     
@@ -237,7 +410,8 @@ class MovieVisualizer:
         start_year: Optional[int] = None,
         end_year: Optional[int] = None,
         figsize: Tuple[int, int] = (14, 8),
-        save_path: Optional[str] = None
+        save_path: Optional[str] = None,
+        ax: Optional[plt.Axes] = None
     ) -> plt.Figure:
         """
         Plot Yearly Trends in Box Office Performance.
@@ -245,17 +419,21 @@ class MovieVisualizer:
         Shows mean and total revenue by year.
         
         Args:
-            df: Spark DataFrame with movie data
+            df: Spark DataFrame with movie data (optionally from ``prepare``)
             start_year: Starting year (optional)
             end_year: Ending year (optional)
             figsize: Figure size (width, height)
-            save_path: Optional path to save the figure
+            save_path: Optional path to save the figure (the figure is closed after saving)
+            ax: Optional Axes to draw on (a new figure is created otherwise)
             
         Returns:
             Matplotlib figure object
         """
+        # Only the columns this plot uses travel through the pipeline
+        df = self._project(df, ['release_year', 'release_date', 'revenue_musd', 'budget_musd', 'vote_average'])
+        
         # Ensure release_year exists
-        df_year = df.withColumn('release_year', F.year(F.col('release_date'))) \
+        df_year = self._add_derived_columns(df) \
                     .filter(F.col('release_year').isNotNull() & 
                            F.col('revenue_musd').isNotNull())
         
@@ -278,15 +456,19 @@ class MovieVisualizer:
         pdf = yearly_stats.toPandas()
         
         # Create figure with two y-axes
-        fig, ax1 = plt.subplots(figsize=figsize)
+        if ax is None:
+            fig, ax1 = plt.subplots(figsize=figsize)
+        else:
+            fig, ax1 = ax.figure, ax
         ax2 = ax1.twinx()
         
         # Plot mean revenue (bar)
-        ax1.bar(pdf['release_year'], pdf['mean_revenue'], 
+        years = pdf['release_year'].to_numpy()
+        ax1.bar(years, pdf['mean_revenue'].to_numpy(), 
                alpha=0.7, color='steelblue', label='Mean Revenue')
         
         # Plot total revenue (line)
-        ax2.plot(pdf['release_year'], pdf['total_revenue'], 
+        ax2.plot(years, pdf['total_revenue'].to_numpy(), 
                 color='darkred', marker='o', linewidth=2, 
                 markersize=6, label='Total Revenue')
         
@@ -305,11 +487,13 @@ class MovieVisualizer:
         ax1.tick_params(axis='y', labelcolor='steelblue')
         ax2.tick_params(axis='y', labelcolor='darkred')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
             logger.info(f"Saved plot to {save_path}")
+            # Release the figure when rendering to file, e.g. in batch runs
+            plt.close(fig)
         
         return fig
     
@@ -325,27 +509,19 @@ class MovieVisualizer:
         Shows mean revenue, budget, rating, and popularity.
         
         Args:
-            df: Spark DataFrame with movie data
+            df: Spark DataFrame with movie data (optionally from ``prepare``)
             figsize: Figure size (width, height)
-            save_path: Optional path to save the figure
+            save_path: Optional path to save the figure (the figure is closed after saving)
             
         Returns:
             Matplotlib figure object
         """
-        # Add franchise flag
-        df_flagged = df.withColumn(
-            'movie_type',
-            F.when(F.col('collection_name').isNotNull(), 'Franchise').otherwise('Standalone')
-        )
+        # Only the columns this plot uses travel through the pipeline
+        df = self._project(df, ['movie_type', 'collection_name', 'revenue_musd', 'budget_musd',
+                                'vote_average', 'popularity', 'roi'])
         
-        # Calculate ROI
-        df_calc = df_flagged.withColumn(
-            'roi',
-            F.when(
-                F.col('budget_musd') > 0,
-                ((F.col('revenue_musd') - F.col('budget_musd')) / F.col('budget_musd') * 100)
-            ).otherwise(None)
-        )
+        # Add franchise flag and ROI unless already prepared
+        df_calc = self._add_derived_columns(df)
         
         # Aggregate by type
         comparison = df_calc.groupBy('movie_type').agg(
@@ -379,24 +555,26 @@ class MovieVisualizer:
             col = idx % 3
             ax = axes[row, col]
             
-            sns.barplot(data=pdf, x='movie_type', y=metric, ax=ax, palette=palette)
+            # Values are already aggregated, so draw bars directly (no estimator)
+            values = pdf[metric].to_numpy()
+            ax.bar(pdf['movie_type'].to_numpy(), values, color=sns.color_palette(palette, n_colors=len(pdf)))
             ax.set_title(title, fontsize=11, fontweight='bold')
             ax.set_xlabel('')
             ax.set_ylabel('')
             ax.grid(True, alpha=0.3, axis='y')
             
-            # Add value labels on bars
-            for container in ax.containers:
-                ax.bar_label(container, fmt='%.1f', padding=3)
+            # Add value labels on bars at fixed offsets (no bbox measuring)
+            for bar, value in zip(ax.patches, values):
+                ax.annotate(f'{value:.1f}', (bar.get_x() + bar.get_width() / 2, bar.get_height()),
+                            ha='center', va='bottom', xytext=(0, 3), textcoords='offset points')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
             logger.info(f"Saved plot to {save_path}")
+            # Release the figure when rendering to file, e.g. in batch runs
+            plt.close(fig)
         
         return fig
 
-
-# Add numpy import for trend line
-import numpy as np
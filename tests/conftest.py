@@ -1,12 +1,30 @@
 
 import pytest
-import sys
 import os
+import requests
 from pathlib import Path
 from pyspark.sql import SparkSession
 
-# Add src to path so we can import modules
-sys.path.append(str(Path(__file__).parent.parent))
+def pytest_configure(config):
+    """
+    Put pytest's tmp_path root on tmpfs when /dev/shm is writable.
+    Only the temp root moves: pytest still creates a numbered pytest-N
+    directory per run (keeping the last three), so concurrent runs never
+    share or wipe each other's basetemp. An explicit --basetemp or
+    PYTEST_DEBUG_TEMPROOT wins.
+    """
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        os.environ.setdefault("PYTEST_DEBUG_TEMPROOT", str(shm))
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Mark every test that requests the spark fixture, so `-m "not spark"`
+    runs the pure-Python tests without starting a JVM.
+    """
+    for item in items:
+        if "spark" in item.fixturenames:
+            item.add_marker(pytest.mark.spark)
 
 @pytest.fixture(scope="session")
 def spark():
@@ -18,6 +36,18 @@ def spark():
              .master("local[*]")
              .appName("TMDB_Analysis_Tests")
              .config("spark.driver.host", "localhost")
+             .config("spark.driver.maxResultSize", "4g")
+             .config("spark.sql.execution.arrow.pyspark.enabled", "true")
+             # Test data is a handful of rows: skip adaptive planning, shuffle
+             # into a single partition and don't start the web UI
+             .config("spark.sql.shuffle.partitions", "1")
+             .config("spark.default.parallelism", "1")
+             .config("spark.sql.adaptive.enabled", "false")
+             .config("spark.sql.adaptive.coalescePartitions.enabled", "false")
+             .config("spark.ui.enabled", "false")
+             .config("spark.serializer", "org.apache.spark.serializer.KryoSerializer")
+             .config("spark.kryo.registrationRequired", "false")
+             .config("spark.kryoserializer.buffer.max", "256m")
              .getOrCreate())
     
     # Set log level to WARN to reduce noise
@@ -27,6 +57,17 @@ def spark():
     
     spark.stop()
 
+@pytest.fixture(autouse=True)
+def _no_network(monkeypatch):
+    """
+    Fail any test that would send a real HTTP request.
+    Fetch tests patch requests themselves, so this only trips on a missed patch.
+    """
+    def _blocked(self, method, url, *args, **kwargs):
+        pytest.fail(f"Unmocked network call in test: {method} {url}")
+    
+    monkeypatch.setattr(requests.Session, "request", _blocked)
+
 @pytest.fixture(scope="session")
 def config_path(tmp_path_factory):
     """
@@ -58,3 +99,15 @@ def config_path(tmp_path_factory):
         f.write(content)
         
     return str(config_file)
+
+@pytest.fixture(scope="session")
+def shared_json_file(tmp_path_factory):
+    """
+    Write one JSON file per session for tests that only read it.
+    """
+    from src.utils.helpers import save_json
+    
+    json_file = tmp_path_factory.mktemp("json") / "test.json"
+    save_json({"test": "data", "number": 42}, str(json_file))
+    
+    return json_file
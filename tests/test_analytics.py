@@ -4,11 +4,13 @@ from pyspark.sql import Row
 from pyspark.sql import functions as F
 from src.analytics.kpi_calculator import SparkKPICalculator
 from src.analytics.aggregations import SparkMovieAggregations
+from src.analytics.filters import SparkMovieFilters
+from src.cleaning.cleaner import SparkMovieDataCleaner
 
 class TestKPICalculator:
     """Test SparkKPICalculator class."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def kpi_data(self, spark):
         """Create sample data for KPI calculations."""
         data = [
@@ -16,7 +18,9 @@ class TestKPICalculator:
             {"title": "Low Rev", "revenue_musd": 10.0, "budget_musd": 5.0, "vote_count": 5, "vote_average": 9.0, "popularity": 1.0, "release_date": "2021-01-01"},
             {"title": "Flop", "revenue_musd": 1.0, "budget_musd": 20.0, "vote_count": 50, "vote_average": 2.0, "popularity": 5.0, "release_date": "2022-01-01"},
         ]
-        return spark.createDataFrame(data)
+        schema = ("title STRING, revenue_musd DOUBLE, budget_musd DOUBLE, vote_count BIGINT, "
+                  "vote_average DOUBLE, popularity DOUBLE, release_date STRING")
+        return spark.createDataFrame(data, schema)
 
     def test_rank_movies_revenue(self, spark, kpi_data):
         calc = SparkKPICalculator(spark)
@@ -28,6 +32,21 @@ class TestKPICalculator:
         assert rows[0]['rank'] == 1
         assert rows[0]['title'] == "High Rev"
 
+    def test_rank_movies_multi_partition(self, spark, kpi_data):
+        calc = SparkKPICalculator(spark)
+        result = calc.rank_movies(kpi_data.repartition(3), "revenue_musd", top_n=3)
+        rows = result.collect()
+        
+        assert [r['rank'] for r in rows] == [1, 2, 3]
+        assert [r['title'] for r in rows] == ["High Rev", "Low Rev", "Flop"]
+
+    def test_rank_movies_missing_metric(self, spark, kpi_data):
+        calc = SparkKPICalculator()  # no SparkSession needed for the empty result
+        result = calc.rank_movies(kpi_data, "missing_metric")
+        
+        assert result.columns == ['rank', 'title']
+        assert result.count() == 0
+
     def test_get_top_by_roi(self, spark, kpi_data):
         calc = SparkKPICalculator(spark)
         # High Rev: (100-50)/50 = 100% ROI. Budget >= 10.
@@ -56,7 +75,7 @@ class TestKPICalculator:
 class TestAggregations:
     """Test SparkMovieAggregations class."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def agg_data(self, spark):
         """Create sample data for aggregations."""
         data = [
@@ -64,18 +83,19 @@ class TestAggregations:
             {"title": "F2", "collection_name": "Franchise A", "director": "Director X", "revenue_musd": 150.0, "budget_musd": 60.0, "vote_average": 8.0, "popularity": 12.0, "vote_count": 120},
             {"title": "S1", "collection_name": None, "director": "Director Y", "revenue_musd": 40.0, "budget_musd": 20.0, "vote_average": 6.0, "popularity": 5.0, "vote_count": 50},
         ]
-        return spark.createDataFrame(data)
+        schema = ("title STRING, collection_name STRING, director STRING, revenue_musd DOUBLE, "
+                  "budget_musd DOUBLE, vote_average DOUBLE, popularity DOUBLE, vote_count BIGINT")
+        return spark.createDataFrame(data, schema)
 
     def test_compare_franchise_vs_standalone(self, spark, agg_data):
         agg = SparkMovieAggregations(spark)
         result = agg.compare_franchise_vs_standalone(agg_data)
-        rows = result.collect()
         
         # Should have 2 rows: Franchise and Standalone
-        assert len(rows) == 2
+        assert result.count() == 2
         
-        franchise_row = next(r for r in rows if r['is_franchise'] == 'Franchise')
-        standalone_row = next(r for r in rows if r['is_franchise'] == 'Standalone')
+        franchise_row = result.filter(F.col('is_franchise') == 'Franchise').first()
+        standalone_row = result.filter(F.col('is_franchise') == 'Standalone').first()
         
         assert franchise_row['movie_count'] == 2
         # Mean rev: (100+150)/2 = 125
@@ -96,9 +116,113 @@ class TestAggregations:
     def test_get_top_directors(self, spark, agg_data):
         agg = SparkMovieAggregations(spark)
         result = agg.get_top_directors(agg_data, top_n=5)
-        rows = result.collect()
         
         # Director X has 2 movies, Y has 1
-        director_x = next(r for r in rows if r['director'] == "Director X")
+        director_x = result.filter(F.col('director') == "Director X").first()
         assert director_x['movie_count'] == 2
         assert director_x['total_revenue_musd'] == 250.0
+
+    def test_get_top_directors_ranks_multi_partition(self, spark, agg_data):
+        agg = SparkMovieAggregations(spark)
+        result = agg.get_top_directors(agg_data.repartition(3), top_n=5)
+        rows = result.collect()
+        
+        assert [r['rank'] for r in rows] == list(range(1, len(rows) + 1))
+        assert rows[0]['director'] == "Director X"
+
+    def test_prepare(self, spark, agg_data):
+        agg = SparkMovieAggregations(spark)
+        prepared = agg.prepare(agg_data)
+        
+        assert prepared.is_cached
+        for col in ['is_franchise', 'profit_musd', 'roi']:
+            assert col in prepared.columns
+        
+        # Prepared frame feeds every analysis without recomputing columns
+        rows = agg.compare_franchise_vs_standalone(prepared).collect()
+        assert len(rows) == 2
+        
+        top = agg.get_top_franchises(prepared, top_n=5).collect()
+        assert top[0]['collection_name'] == "Franchise A"
+        
+        details = agg.get_franchise_details(prepared, "Franchise A")
+        assert details.count() == 2
+        
+        prepared.unpersist()
+
+class TestFilters:
+    """Test SparkMovieFilters class."""
+    
+    @pytest.fixture(scope="class")
+    def filter_data(self, spark):
+        """Create sample data for filtering."""
+        data = [
+            {"id": 1, "title": "M1", "genres": "Action|Science Fiction", "cast": "Bruce Willis|Milla Jovovich", "director": "Luc Besson", "vote_average": 7.5, "vote_count": 100, "runtime": 126},
+            {"id": 2, "title": "M2", "genres": "Action|Drama", "cast": "Uma Thurman|David Carradine", "director": "Quentin Tarantino", "vote_average": 8.0, "vote_count": 200, "runtime": 111},
+            {"id": 3, "title": "M3", "genres": "Docudrama", "cast": "Someone Else", "director": "Jane Doe", "vote_average": 6.0, "vote_count": 20, "runtime": 90},
+        ]
+        return spark.createDataFrame(data)
+
+    def test_filter_by_genres_match_all(self, spark, filter_data):
+        filters = SparkMovieFilters(spark)
+        result = filters.filter_by_genres(filter_data, ["Action", "Science Fiction"], match_all=True)
+        titles = [r['title'] for r in result.collect()]
+        
+        assert titles == ["M1"]
+
+    def test_filter_by_genres_match_all_with_mask(self, spark, filter_data):
+        filters = SparkMovieFilters(spark)
+        masked = SparkMovieDataCleaner(spark).add_genre_mask(filter_data)
+        result = filters.filter_by_genres(masked, ["Action", "Science Fiction"], match_all=True)
+        titles = [r['title'] for r in result.collect()]
+        
+        assert titles == ["M1"]
+
+    def test_filter_by_genres_empty_list(self, spark, filter_data):
+        filters = SparkMovieFilters(spark)
+        
+        assert filters.filter_by_genres(filter_data, [], match_all=True).count() == 3
+        assert filters.filter_by_genres(filter_data, [], match_all=False).count() == 0
+
+    def test_filter_by_genres_whole_names(self, spark, filter_data):
+        filters = SparkMovieFilters(spark)
+        # "Drama" must not match "Docudrama"
+        result = filters.filter_by_genres(filter_data, "Drama", match_all=False)
+        titles = [r['title'] for r in result.collect()]
+        
+        assert titles == ["M2"]
+
+    def test_filter_by_actor_with_cast_index(self, spark, filter_data):
+        filters = SparkMovieFilters(spark)
+        cast_index = SparkMovieDataCleaner(spark).build_cast_index(filter_data)
+        
+        result = filters.filter_by_actor(filter_data, "uma thurman", cast_index=cast_index)
+        titles = [r['title'] for r in result.collect()]
+        
+        assert titles == ["M2"]
+
+    def test_filter_by_director_missing_column(self, spark, filter_data):
+        filters = SparkMovieFilters(spark)
+        df = filter_data.drop('director')
+        
+        for director in ["Luc Besson", "Jane Doe"]:
+            result = filters.filter_by_director(df, director)
+            
+            assert result.count() == 0
+            assert result.schema == df.schema
+
+    def test_search_uma_tarantino_repeated_calls(self, spark, filter_data):
+        filters = SparkMovieFilters(spark)
+        first = filters.search_uma_tarantino(filter_data)
+        second = filters.search_uma_tarantino(filter_data)
+        
+        assert [r['title'] for r in first.collect()] == ["M2"]
+        assert [r['title'] for r in second.collect()] == ["M2"]
+        assert second.schema == first.schema
+
+    def test_search_movies_multiple_actors(self, spark, filter_data):
+        filters = SparkMovieFilters(spark)
+        result = filters.search_movies(filter_data, actors=["bruce willis", "UMA THURMAN"], sort_by='title', ascending=True)
+        titles = [r['title'] for r in result.collect()]
+        
+        assert titles == ["M1", "M2"]
@@ -5,7 +5,8 @@ from pyspark.sql import Row
 from pyspark.sql import functions as F
 from pyspark.sql.types import StructType, StructField, StringType, ArrayType, IntegerType, StructType
 
-from src.cleaning.cleaner import SparkMovieDataCleaner
+from src.cleaning.cleaner import SparkMovieDataCleaner, TMDB_SCHEMA
+from src.utils.helpers import save_json
 
 # Use collections.namedtuple for easy UDF input mocking if Row is not enough, 
 # but Row is usually sufficient for Spark.
@@ -14,7 +15,7 @@ class TestCleaner:
 
     """Test SparkMovieDataCleaner class."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def sample_data(self, spark):
         """Create sample raw movie data."""
         return spark.createDataFrame([
@@ -56,7 +57,7 @@ class TestCleaner:
         cleaner = SparkMovieDataCleaner(spark)
         flattened = cleaner.flatten_nested_columns(sample_data)
         
-        rows = flattened.collect()
+        rows = flattened.take(2)
         assert rows[0]["collection_name"] == "Test Collection"
         assert rows[0]["genres"] == "Action"
         assert rows[1]["collection_name"] is None
@@ -71,7 +72,7 @@ class TestCleaner:
         assert schema['budget'] == 'bigint' # long
         
         # Check MUSD calculation
-        rows = cleaned.collect()
+        rows = cleaned.take(2)
         assert rows[0]['revenue_musd'] == 1.0 # 1000000 / 1000000
         
         # Check zero handling (should be null)
@@ -92,3 +93,146 @@ class TestCleaner:
         filtered = cleaner.filter_data(df)
         assert filtered.count() == 1
         assert filtered.first()['id'] == 1
+
+    def test_engineer_features_profit_roi(self, spark, sample_data):
+        cleaner = SparkMovieDataCleaner(spark)
+        df = cleaner.clean_datatypes(sample_data)
+        engineered = cleaner.engineer_features(df)
+        
+        rows = engineered.orderBy('id').collect()
+        # budget 0.5M, revenue 1.0M
+        assert rows[0]['profit_musd'] == 0.5
+        assert rows[0]['roi'] == 100.0
+        assert rows[0]['release_year'] == 2023
+        
+        # Zero budget/revenue are nulled, so no ROI
+        assert rows[1]['roi'] is None
+
+    def test_add_array_columns(self, spark, sample_data):
+        cleaner = SparkMovieDataCleaner(spark)
+        df = cleaner.flatten_nested_columns(sample_data)
+        result = cleaner.add_array_columns(df)
+        
+        rows = result.orderBy('id').collect()
+        assert rows[0]['genres_arr'] == ["Action"]
+        assert rows[1]['genres_arr'] == []
+
+
+def _raw_movie(movie_id, title, genres):
+    """Build a TMDB /movie/{id} response with credits and keywords appended."""
+    return {
+        "id": movie_id,
+        "title": title,
+        "imdb_id": f"tt{movie_id:07d}",  # not in TMDB_SCHEMA, never read
+        "adult": False,
+        "status": "Released",
+        "release_date": f"20{10 + movie_id}-05-01",
+        "budget": 1000000 * movie_id,
+        "revenue": 3000000 * movie_id,
+        "runtime": 100 + movie_id,
+        "popularity": 1.5 * movie_id,
+        "vote_average": 7.0,
+        "vote_count": 100 * movie_id,
+        "original_language": "en",
+        "overview": "An overview",
+        "tagline": "A tagline",
+        "belongs_to_collection": {"id": 1, "name": "Collection"} if movie_id == 1 else None,
+        "genres": [{"id": i, "name": name} for i, name in enumerate(genres)],
+        "production_companies": [{"id": 1, "name": "Studio"}],
+        "production_countries": [{"iso_3166_1": "US", "name": "United States of America"}],
+        "spoken_languages": [{"iso_639_1": "en", "name": "English"}],
+        "credits": {
+            "cast": [{"name": f"Actor {movie_id}", "character": "Lead"}],
+            "crew": [{"name": f"Director {movie_id}", "job": "Director"}]
+        },
+        "keywords": {"keywords": [{"id": 1, "name": "hero"}]}
+    }
+
+
+class TestLoadRawData:
+    """Test the load_raw_data ingestion paths against the same raw files."""
+    
+    @pytest.fixture(scope="class")
+    def raw_dir(self, tmp_path_factory):
+        """Write three movie files and one truncated (malformed) file."""
+        raw_dir = tmp_path_factory.mktemp("raw")
+        save_json(_raw_movie(1, "First", ["Drama", "Action"]), str(raw_dir / "1.json"))
+        save_json(_raw_movie(2, "Second", ["Comedy"]), str(raw_dir / "2.json"))
+        save_json(_raw_movie(3, "Third", []), str(raw_dir / "3.json"))
+        (raw_dir / "4.json").write_text('{\n  "id": 4,\n  "title": "Broken"', encoding="utf-8")
+        return raw_dir
+    
+    @pytest.fixture(scope="class")
+    def expected(self, spark, raw_dir):
+        """Rows from the default multiLine reader, which every path must match."""
+        df = SparkMovieDataCleaner(spark).load_raw_data(str(raw_dir))
+        return df.columns, df.orderBy('id').collect()
+    
+    def test_default_reader_uses_schema(self, spark, raw_dir, expected):
+        columns, rows = expected
+        df = SparkMovieDataCleaner(spark).load_raw_data(str(raw_dir))
+        
+        assert df.schema == TMDB_SCHEMA
+        assert "imdb_id" not in columns
+        # The malformed file is dropped
+        assert [r['id'] for r in rows] == [1, 2, 3]
+        assert rows[0]['credits']['crew'][0]['job'] == "Director"
+    
+    def test_small_files(self, spark, raw_dir, expected):
+        df = SparkMovieDataCleaner(spark).load_raw_data(str(raw_dir), small_files=True)
+        
+        assert (df.columns, df.orderBy('id').collect()) == expected
+    
+    def test_threaded(self, spark, raw_dir, expected):
+        df = SparkMovieDataCleaner(spark).load_raw_data(str(raw_dir), threaded=True)
+        
+        assert (df.columns, df.orderBy('id').collect()) == expected
+    
+    def test_cache_path(self, spark, raw_dir, expected, tmp_path):
+        cleaner = SparkMovieDataCleaner(spark)
+        cache_path = str(tmp_path / "raw_snapshot.parquet")
+        
+        # First call parses the JSON and writes the snapshot, second reads it
+        written = cleaner.load_raw_data(str(raw_dir), cache_path=cache_path)
+        assert (written.columns, written.orderBy('id').collect()) == expected
+        
+        cached = cleaner.load_raw_data(str(raw_dir), cache_path=cache_path)
+        assert (cached.columns, cached.orderBy('id').collect()) == expected
+    
+    def test_save_cleaned_data(self, spark, raw_dir, tmp_path):
+        import pandas as pd
+        
+        cleaner = SparkMovieDataCleaner(spark)
+        cleaned = cleaner.clean_all(cleaner.load_raw_data(str(raw_dir)))
+        cleaner.save_cleaned_data(cleaned, str(tmp_path))
+        
+        parquet = spark.read.parquet(str(tmp_path / "movies_cleaned.parquet"))
+        rows = parquet.orderBy('id').collect()
+        assert [r['id'] for r in rows] == [1, 2, 3]
+        assert rows[0]['release_year'] == 2011
+        assert rows[0]['genres_arr'] == ["Action", "Drama"]
+        assert rows[2]['genres_arr'] == []
+        
+        pdf = pd.read_csv(tmp_path / "movies_cleaned.csv")
+        assert sorted(pdf['id']) == [1, 2, 3]
+        assert list(pdf.columns) == cleaned.columns
+        
+        cleaner.release()
+    
+    def test_clean_all_releases_previous_run(self, spark, raw_dir):
+        cleaner = SparkMovieDataCleaner(spark)
+        raw = cleaner.load_raw_data(str(raw_dir))
+        
+        cleaner.clean_all(raw)
+        first = cleaner._filtered
+        assert first.is_cached
+        
+        # A second run frees the first run's cache before persisting its own
+        cleaned = cleaner.clean_all(raw)
+        assert not first.is_cached
+        assert cleaner._filtered.is_cached
+        
+        cleaner.release()
+        assert cleaner._filtered is None
+        # The cleaned DataFrame is still usable after release
+        assert cleaned.count() == 3
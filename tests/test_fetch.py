@@ -2,7 +2,21 @@
 import pytest
 from unittest.mock import patch, MagicMock, mock_open
 import requests
+from types import MappingProxyType
 from src.fetch.fetch_tmdb_api import TMDBFetcher
+from src.utils.helpers import load_json
+
+# Shared by every mock_config; read-only so no test can leak changes into another
+_API_CONFIG = MappingProxyType({
+    'base_url': 'http://test.api',
+    'timeout': 5,
+    'rate_limit_delay': 0
+})
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    """Skip the fetcher's rate-limit sleeps whatever rate_limit_delay is configured."""
+    monkeypatch.setattr('src.fetch.fetch_tmdb_api.time.sleep', lambda *_: None)
 
 class TestTMDBFetcher:
     """Test TMDBFetcher class."""
@@ -14,16 +28,12 @@ class TestTMDBFetcher:
             yield
 
     @pytest.fixture
-    def mock_config(self):
-        """Mock configuration loader."""
+    def mock_config(self, tmp_path):
+        """Mock configuration loader with a per-test raw data directory."""
         config = {
-            'api': {
-                'base_url': 'http://test.api',
-                'timeout': 5,
-                'rate_limit_delay': 0
-            },
+            'api': _API_CONFIG,
             'paths': {
-                'raw_data': 'test_data'
+                'raw_data': str(tmp_path / 'raw')
             }
         }
         with patch('src.fetch.fetch_tmdb_api.load_config', return_value=config):
@@ -38,62 +48,42 @@ class TestTMDBFetcher:
                     # Use a plausible path, though load_config shouldn't be reached
                     TMDBFetcher(config_path="config/config.yaml")
 
-    def test_fetch_movie_success(self, mock_env, mock_config, tmp_path):
+    def test_fetch_movie_success(self, mock_env, mock_config, fs):
         """Test successful movie fetch."""
-        
-        # Mock pathlib Path in the class to control where it writes or check calls
-        with patch('src.fetch.fetch_tmdb_api.Path') as MockPath:
-            # Setup path mock
-            mock_path_instance = MagicMock()
-            MockPath.return_value = mock_path_instance
-            mock_path_instance.__truediv__.return_value = mock_path_instance
-            mock_path_instance.exists.return_value = False # File doesn't exist
+        # fs (pyfakefs) keeps the raw JSON write in memory
+        with patch('src.fetch.fetch_tmdb_api.requests.Session.get') as mock_get:
+            mock_response = MagicMock()
+            mock_response.json.return_value = {"id": 1, "title": "Test"}
+            mock_response.status_code = 200
+            mock_get.return_value = mock_response
             
-            # Mock requests
-            with patch('requests.get') as mock_get:
-                mock_response = MagicMock()
-                mock_response.json.return_value = {"id": 1, "title": "Test"}
-                mock_response.status_code = 200
-                mock_get.return_value = mock_response
-                
-                # Mock save_json helper
-                with patch('src.fetch.fetch_tmdb_api.save_json') as mock_save:
-                    
-                    # mock_config fixture handles load_config, so path string is just for show
-                    fetcher = TMDBFetcher(config_path="config/config.yaml")
-                    result = fetcher.fetch_movie(1)
-                    
-                    assert result == {"id": 1, "title": "Test"}
-                    mock_get.assert_called_once()
-                    mock_save.assert_called_once()
+            # mock_config fixture handles load_config, so path string is just for show
+            fetcher = TMDBFetcher(config_path="config/config.yaml")
+            result = fetcher.fetch_movie(1)
+            
+            assert result == {"id": 1, "title": "Test"}
+            mock_get.assert_called_once()
+            assert load_json(str(fetcher.raw_data_path / "1.json")) == {"id": 1, "title": "Test"}
 
-    def test_fetch_movie_skip_existing(self, mock_env, mock_config):
+    def test_fetch_movie_skip_existing(self, mock_env, mock_config, fs):
         """Test skipping existing files."""
-        with patch('src.fetch.fetch_tmdb_api.Path') as MockPath:
-            mock_path_instance = MagicMock()
-            MockPath.return_value = mock_path_instance
-            mock_path_instance.__truediv__.return_value = mock_path_instance
-            mock_path_instance.exists.return_value = True # File exists
+        fetcher = TMDBFetcher(config_path="config/config.yaml")
+        fs.create_file(fetcher.raw_data_path / "1.json", contents="{}")
+        
+        result = fetcher.fetch_movie(1, skip_existing=True)
+        
+        assert result is None
+
+    def test_fetch_movie_failure(self, mock_env, mock_config, fs):
+        """Test handling of API errors."""
+        with patch('src.fetch.fetch_tmdb_api.requests.Session.get') as mock_get:
+            mock_get.side_effect = requests.exceptions.RequestException("API Error")
             
             fetcher = TMDBFetcher(config_path="config/config.yaml")
-            result = fetcher.fetch_movie(1, skip_existing=True)
+            result = fetcher.fetch_movie(1)
             
             assert result is None
-
-    def test_fetch_movie_failure(self, mock_env, mock_config):
-        """Test handling of API errors."""
-        with patch('src.fetch.fetch_tmdb_api.Path') as MockPath:
-            mock_path_instance = MagicMock()
-            MockPath.return_value = mock_path_instance
-            mock_path_instance.__truediv__.return_value = mock_path_instance
-            
-            with patch('requests.get') as mock_get:
-                mock_get.side_effect = requests.exceptions.RequestException("API Error")
-                
-                fetcher = TMDBFetcher(config_path="config/config.yaml")
-                result = fetcher.fetch_movie(1)
-                
-                assert result is None
+            assert not (fetcher.raw_data_path / "1.json").exists()
 
     def test_fetch_movies_batch(self, mock_env, mock_config):
         """Test batch fetching."""
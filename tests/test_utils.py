@@ -3,7 +3,7 @@ import pytest
 import os
 import json
 import logging
-from src.utils.helpers import load_config, load_json, save_json
+from src.utils.helpers import load_config, load_json, save_json, get_all_json_files
 
 # Checking the actual file content: helpers.py has load_config, load_json, save_json, get_all_json_files, setup_logging.
 # cleaning/udfs.py has sort_pipe_separated.
@@ -14,6 +14,13 @@ def test_load_config(config_path):
     assert 'api' in config
     assert config['api']['base_url'] == "https://api.themoviedb.org/3"
 
+def test_load_config_returns_copies(config_path):
+    """Test that cached config cannot be mutated through a returned dict."""
+    config = load_config(config_path)
+    config['api']['base_url'] = "changed"
+    
+    assert load_config(config_path)['api']['base_url'] == "https://api.themoviedb.org/3"
+
 def test_save_and_load_json(tmp_path):
     """Test saving and loading JSON data."""
     test_data = {"key": "value", "number": 123}
@@ -27,6 +34,23 @@ def test_save_and_load_json(tmp_path):
     loaded_data = load_json(str(file_path))
     assert loaded_data == test_data
 
+def test_load_json(shared_json_file):
+    """Test loading an existing JSON file."""
+    assert load_json(str(shared_json_file)) == {"test": "data", "number": 42}
+
+def test_get_all_json_files(tmp_path):
+    """Test that only visible .json files are listed."""
+    (tmp_path / "1.json").write_text("{}")
+    (tmp_path / "2.json").write_text("{}")
+    (tmp_path / ".hidden.json").write_text("{}")
+    (tmp_path / "notes.txt").write_text("")
+    (tmp_path / "dir.json").mkdir()
+    
+    files = get_all_json_files(str(tmp_path))
+    
+    assert sorted(f.name for f in files) == ["1.json", "2.json"]
+    assert get_all_json_files(str(tmp_path / "missing")) == []
+
 def test_setup_logging(config_path, caplog):
     """Test logging setup."""
     from src.utils.helpers import setup_logging
@@ -39,3 +63,13 @@ def test_setup_logging(config_path, caplog):
         logger.info("Test message")
         
     assert "Test message" in caplog.text
+
+def test_get_spark_session_reuses_session(spark):
+    """Test that get_spark_session returns the running session instead of building one."""
+    from src.utils.spark_utils import get_spark_session
+    
+    first = get_spark_session(app_name="TMDB_Analysis_Tests")
+    second = get_spark_session(app_name="TMDB_Analysis_Tests")
+    
+    assert first is spark
+    assert second is first